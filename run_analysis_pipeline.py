@@ -6,36 +6,140 @@ Main script to execute the complete YouTube data analysis workflow.
 
 import os
 import sys
+import time
+import argparse
+import tempfile
 import subprocess
 from datetime import datetime
 
-def run_script(script_name, description):
-    """Run a Python script and handle errors."""
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+
+from instrumentation import (METRICS_FILE_VAR, RUN_ID_VAR, STAGE_VAR,
+                             emit, metrics_offset, new_run_id,
+                             read_metrics, rusage_peak_mb)
+from stage_options import NO_PLOTS_VAR, CHUNK_SIZE_VAR, SKETCH_VAR, FULL_VAR
+
+# Metrics and profile output locations
+metrics_file = os.path.expanduser('~/Developer/youtube-analysis/output/metrics/pipeline_metrics.jsonl')
+profiles_dir = os.path.expanduser('~/Developer/youtube-analysis/output/profiles')
+
+def exit_code(status):
+    """Convert a raw wait status into a subprocess-style return code."""
+    return os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+
+def record_stage_metrics(stage, run_id, wall_seconds, usage, success, offset=0):
+    """Emit a stage total built from the child's resource usage and its sub-steps.
+
+    Only the records appended after offset are read, so earlier runs are not reparsed.
+    """
+    steps = [r for r in read_metrics(os.environ[METRICS_FILE_VAR], run_id, offset)
+             if r.get('stage') == stage and r.get('step') != 'total']
+    record = {
+        'stage': stage,
+        'step': 'total',
+        'success': success,
+        'wall_seconds': round(wall_seconds, 4),
+        'cpu_seconds': round(usage.ru_utime + usage.ru_stime, 4),
+        'peak_rss_mb': round(rusage_peak_mb(usage), 1),
+        'rows': max((r['rows'] for r in steps if r.get('rows') is not None), default=None),
+        'bytes_read': sum(r.get('bytes_read') or 0 for r in steps),
+        'bytes_written': sum(r.get('bytes_written') or 0 for r in steps),
+        'error': next((r['error'] for r in steps if r.get('error')), None)
+    }
+    emit(record)
+    return record
+
+def run_script(script_name, description, run_id, profile_dir=None):
+    """Run a Python script, record its metrics and handle errors."""
     script_path = os.path.join('scripts', script_name)
+    stage = os.path.splitext(script_name)[0]
     print(f"\n{'='*60}")
     print(f"Running: {description}")
     print(f"{'='*60}")
     
+    command = [sys.executable, script_path]
+    if profile_dir:
+        # pstats output, viewable with snakeviz or convertible with flameprof
+        command = [sys.executable, '-m', 'cProfile', '-o', os.path.join(profile_dir, f'{stage}.prof'), script_path]
+    env = dict(os.environ, **{STAGE_VAR: stage})
+    
     try:
-        result = subprocess.run([sys.executable, script_path], 
-                              capture_output=True, text=True, check=True)
-        print(result.stdout)
-        if result.stderr:
-            print(f"Warning: {result.stderr}")
-        print(f"✅ {description} completed successfully")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Error in {description}:")
-        print(f"stdout: {e.stdout}")
-        print(f"stderr: {e.stderr}")
-        return False
+        with tempfile.TemporaryFile('w+') as stdout, tempfile.TemporaryFile('w+') as stderr:
+            offset = metrics_offset(os.environ[METRICS_FILE_VAR])
+            started = time.perf_counter()
+            process = subprocess.Popen(command, stdout=stdout, stderr=stderr, text=True, env=env)
+            # wait4 gives this child's own CPU time and peak RSS
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = exit_code(status)
+            wall_seconds = time.perf_counter() - started
+            stdout.seek(0)
+            stderr.seek(0)
+            output, errors = stdout.read(), stderr.read()
+        
+        success = process.returncode == 0
+        record = record_stage_metrics(stage, run_id, wall_seconds, usage, success, offset)
+        if not success:
+            print(f"❌ Error in {description}:")
+            print(f"stdout: {output}")
+            print(f"stderr: {errors}")
+            return None
+        
+        print(output)
+        if errors:
+            print(f"Warning: {errors}")
+        print(f"✅ {description} completed successfully "
+              f"({record['wall_seconds']:.2f}s wall, {record['cpu_seconds']:.2f}s cpu, {record['peak_rss_mb']:.0f} MB peak)")
+        return record
     except Exception as e:
         print(f"❌ Unexpected error in {description}: {e}")
-        return False
+        return None
 
 def main():
     """Execute the complete analysis pipeline."""
+    parser = argparse.ArgumentParser(description='Run the complete YouTube analysis pipeline')
+    parser.add_argument('--metrics-file', default=metrics_file, help='JSON lines file for per-stage metrics')
+    parser.add_argument('--profile', action='store_true', help='Write a cProfile dump per stage')
+    parser.add_argument('--no-plots', action='store_true',
+                        help='Run every analysis without importing or rendering any plotting library')
+    parser.add_argument('--chunk-size', type=int,
+                        help='Stream the cleaned data in chunks of this many rows (out-of-core mode)')
+    parser.add_argument('--sketch', action='store_true',
+                        help='Rank channels and count distinct channels/titles with mergeable sketches')
+    parser.add_argument('--full', action='store_true',
+                        help='Recount trends from scratch instead of adding only new watches')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and update the outputs whenever new exports arrive')
+    args = parser.parse_args()
+    
     start_time = datetime.now()
+    run_id = new_run_id()
+    
+    # Stages append their sub-step metrics to the same file
+    os.makedirs(os.path.dirname(os.path.abspath(args.metrics_file)), exist_ok=True)
+    os.environ[METRICS_FILE_VAR] = os.path.abspath(args.metrics_file)
+    os.environ[RUN_ID_VAR] = run_id
+    if args.no_plots:
+        os.environ[NO_PLOTS_VAR] = '1'
+    if args.chunk_size:
+        os.environ[CHUNK_SIZE_VAR] = str(args.chunk_size)
+    if args.sketch:
+        os.environ[SKETCH_VAR] = '1'
+    if args.full:
+        os.environ[FULL_VAR] = '1'
+    
+    if args.watch:
+        # Stages run by the watcher inherit the options set above
+        from watch_pipeline import watch
+        try:
+            watch(plots=not args.no_plots)
+        except KeyboardInterrupt:
+            print("\nWatch mode stopped")
+        return
+    
+    profile_dir = None
+    if args.profile:
+        profile_dir = os.path.join(profiles_dir, run_id)
+        os.makedirs(profile_dir, exist_ok=True)
     
     print("🎬 YouTube Analysis Pipeline Starting")
     print(f"Started at: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
@@ -46,16 +150,22 @@ def main():
         ('temporal_analysis.py', 'Temporal Analysis'),
         ('content_analysis.py', 'Content Analysis'),
         ('behavioral_analysis.py', 'Behavioral Analysis'),
+        ('rewatch_analysis.py', 'Rewatch Analysis'),
+        ('trend_analysis.py', 'Trend Analysis'),
+        ('topic_clustering.py', 'Topic Clustering'),
         ('personalized_insights.py', 'Personalized Insights'),
         ('report_generation.py', 'Report Generation'),
-        ('data_export.py', 'Data Export')
+        ('dashboard.py', 'Interactive Dashboard'),
+        ('data_export.py', 'Data Export'),
+        ('sql_analytics.py', 'SQL Analytics Database')
     ]
     
     results = []
     
     for script_name, description in pipeline_steps:
-        success = run_script(script_name, description)
-        results.append((description, success))
+        record = run_script(script_name, description, run_id, profile_dir)
+        success = record is not None
+        results.append((description, success, record))
         
         if not success:
             print(f"\n⚠️  Pipeline stopped due to error in {description}")
@@ -73,12 +183,17 @@ def main():
     print(f"Completed at: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
     print()
     
-    successful = sum(1 for _, success in results if success)
+    successful = sum(1 for _, success, _ in results if success)
     total = len(results)
     
-    for description, success in results:
+    for description, success, record in results:
         status = "✅" if success else "❌"
-        print(f"{status} {description}")
+        timing = f" ({record['wall_seconds']:.2f}s, {record['peak_rss_mb']:.0f} MB)" if record else ""
+        print(f"{status} {description}{timing}")
+    
+    print(f"\nMetrics: {args.metrics_file} (run {run_id})")
+    if profile_dir:
+        print(f"Profiles: {profile_dir}")
     
     print(f"\nSuccessful: {successful}/{total}")
     
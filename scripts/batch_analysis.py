@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Multi-Account Batch Analysis
+
+Runs the complete pipeline for every account export in a directory, one
+account per worker process, and builds a cross-account summary table.
+
+Expected input layout (one subdirectory of Takeout JSON files per account):
+
+    accounts/
+    ├── alice/   watch-history.json ...
+    └── bob/     watch-history.json ...
+
+Each account gets its own project directory under the output root with the
+usual output/ tree, plus a pipeline.log of everything the stages printed.
+Workers are forked from a server that has already imported pandas and
+every stage module, so the import cost is paid once per batch.
+"""
+
+import os
+import sys
+import time
+import argparse
+import importlib
+import traceback
+import multiprocessing
+from contextlib import redirect_stdout, redirect_stderr
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from pipeline_paths import PIPELINE_STAGES, CLEANED_FILE, prepare_project_dir, project_path, load_stage
+from instrumentation import METRICS_FILE_VAR, STAGE_VAR
+from stage_options import NO_PLOTS_VAR, CHUNK_SIZE_VAR, SKETCH_VAR, FULL_VAR
+
+# Input and output paths
+accounts_dir = os.path.expanduser('~/Developer/youtube-analysis/data/accounts')
+output_root = os.path.expanduser('~/Developer/youtube-analysis/output/accounts')
+summary_file_name = 'accounts_summary.csv'
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+def find_accounts(directory):
+    """Return (account, export directory) pairs for subdirectories containing JSON files."""
+    accounts = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.isdir(path) and any(f.endswith('.json') for f in os.listdir(path)):
+            accounts.append((name, path))
+    return accounts
+
+def summarize_account(account, project_dir):
+    """Build one row of the cross-account table from an account's outputs."""
+    import pandas as pd
+
+    df = pd.read_csv(project_path(project_dir, CLEANED_FILE), usecols=['title', 'timestamp'])
+    timestamps = pd.to_datetime(df['timestamp'])
+    span_days = max((timestamps.max() - timestamps.min()).days, 1)
+    summary = {
+        'account': account,
+        'total_videos': len(df),
+        'unique_titles': df['title'].nunique(),
+        'first_watch': timestamps.min(),
+        'last_watch': timestamps.max(),
+        'active_days': timestamps.dt.normalize().nunique(),
+        'daily_average': len(df) / span_days,
+        'peak_hour': int(timestamps.dt.hour.value_counts().idxmax()),
+        'peak_day': DAY_NAMES[int(timestamps.dt.dayofweek.value_counts().idxmax())]
+    }
+
+    top_channels_file = project_path(project_dir, 'output/content_analysis/top_channels_overall.csv')
+    if os.path.exists(top_channels_file):
+        top_channels = pd.read_csv(top_channels_file)
+        if len(top_channels):
+            summary['top_channel'] = top_channels.iloc[0, 0]
+            summary['top_channel_videos'] = top_channels.iloc[0, 1]
+
+    categories_file = project_path(project_dir, 'output/content_analysis/content_categories.csv')
+    if os.path.exists(categories_file):
+        categories = pd.read_csv(categories_file).sort_values('Count', ascending=False)
+        if len(categories):
+            summary['top_category'] = categories.iloc[0]['Category']
+
+    return summary
+
+def run_account(account, export_dir, project_dir, stages):
+    """Run the pipeline stages for one account inside a worker process."""
+    prepare_project_dir(project_dir)
+    started = time.perf_counter()
+    stage_seconds = {}
+
+    with open(os.path.join(project_dir, 'pipeline.log'), 'w') as log, \
+            redirect_stdout(log), redirect_stderr(log):
+        try:
+            for stage in stages:
+                module = load_stage(stage, project_dir)
+                if stage == 'data_preparation':
+                    module.input_dir = export_dir
+                os.environ[STAGE_VAR] = stage
+                stage_started = time.perf_counter()
+                module.main()
+                stage_seconds[stage] = round(time.perf_counter() - stage_started, 3)
+            summary = summarize_account(account, project_dir)
+            error = None
+        except Exception as e:
+            traceback.print_exc()
+            summary = {'account': account}
+            error = f"{type(e).__name__}: {e}"
+
+    return {
+        'account': account,
+        'error': error,
+        'seconds': round(time.perf_counter() - started, 3),
+        'stage_seconds': stage_seconds,
+        'summary': summary
+    }
+
+def warm_imports():
+    """Import the heavy libraries and stage modules once per worker."""
+    for module in ['pandas'] + PIPELINE_STAGES:
+        importlib.import_module(module)
+
+def make_pool(workers):
+    """Create a process pool whose workers fork from a pre-imported server where possible."""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['pandas'] + PIPELINE_STAGES)
+    else:
+        context = multiprocessing.get_context()
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=warm_imports)
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description='Run the YouTube analysis pipeline for many accounts in parallel')
+    parser.add_argument('accounts_dir', nargs='?', default=accounts_dir, help='Directory with one export folder per account')
+    parser.add_argument('--output-dir', default=output_root, help='Root for per-account outputs and the summary')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes')
+    parser.add_argument('--stages', nargs='+', default=PIPELINE_STAGES, choices=PIPELINE_STAGES,
+                        help='Stages to run per account')
+    parser.add_argument('--no-plots', action='store_true', help='Skip chart rendering and plotting imports')
+    parser.add_argument('--chunk-size', type=int, help='Stream each account in chunks of this many rows')
+    parser.add_argument('--sketch', action='store_true', help='Use mergeable sketches for channel analytics')
+    parser.add_argument('--full', action='store_true', help='Recount trends from scratch in every account')
+    parser.add_argument('--metrics-file', help='JSON lines file for per-stage metrics')
+    args = parser.parse_args()
+
+    # Set before the pool starts so every worker inherits them
+    if args.no_plots:
+        os.environ[NO_PLOTS_VAR] = '1'
+    if args.metrics_file:
+        os.environ[METRICS_FILE_VAR] = os.path.abspath(args.metrics_file)
+    if args.chunk_size:
+        os.environ[CHUNK_SIZE_VAR] = str(args.chunk_size)
+    if args.sketch:
+        os.environ[SKETCH_VAR] = '1'
+    if args.full:
+        os.environ[FULL_VAR] = '1'
+
+    accounts = find_accounts(args.accounts_dir)
+    if not accounts:
+        print(f"No account exports found in {args.accounts_dir}")
+        sys.exit(1)
+
+    print(f"Running {len(args.stages)} stage(s) for {len(accounts)} account(s) on {args.workers} worker(s)")
+    started = time.perf_counter()
+    results = []
+    with make_pool(args.workers) as pool:
+        futures = [
+            pool.submit(run_account, account, export_dir, os.path.join(args.output_dir, account), args.stages)
+            for account, export_dir in accounts
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            status = "✅" if result['error'] is None else f"❌ {result['error']}"
+            print(f"{status} {result['account']} ({result['seconds']:.1f}s)")
+
+    import pandas as pd
+
+    # Cross-account aggregate table
+    summaries = [r['summary'] for r in sorted(results, key=lambda r: r['account']) if r['error'] is None]
+    os.makedirs(args.output_dir, exist_ok=True)
+    summary_file = os.path.join(args.output_dir, summary_file_name)
+    if summaries:
+        pd.DataFrame(summaries).to_csv(summary_file, index=False)
+
+    elapsed = time.perf_counter() - started
+    serial_seconds = sum(r['seconds'] for r in results)
+    failed = sum(1 for r in results if r['error'] is not None)
+    print(f"\nBatch completed in {elapsed:.1f}s ({serial_seconds / elapsed:.1f}x speed-up over serial)")
+    print(f"Successful: {len(results) - failed}/{len(results)}")
+    if summaries:
+        print(f"Cross-account summary saved to {summary_file}")
+    print(f"Per-account results saved under {args.output_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,17 @@ import pandas as pd
 import os
 from datetime import timedelta
 
+from instrumentation import track
+from out_of_core import iter_chunks, merge_counts, require_rows
+from stage_options import chunk_size
+
 # Input and output paths
 input_file = os.path.expanduser('~/Developer/youtube-analysis/output/cleaned_watch_history.csv')
 output_dir = os.path.expanduser('~/Developer/youtube-analysis/output/behavioral_insights')
 
+# Videos watched within this gap of the previous one belong to the same session
+SESSION_GAP = timedelta(hours=2)
+
 # Load the cleaned watch history data
 def load_data():
     df = pd.read_csv(input_file)
@@ -19,7 +26,7 @@ def detect_binge_watching(df):
     current_session = [df.iloc[0]]
 
     for i in range(1, len(df)):
-        if df.iloc[i]['timestamp'] - current_session[-1]['timestamp'] <= timedelta(hours=2):
+        if df.iloc[i]['timestamp'] - current_session[-1]['timestamp'] <= SESSION_GAP:
             current_session.append(df.iloc[i])
         else:
             sessions.append(current_session)
@@ -30,35 +37,95 @@ def detect_binge_watching(df):
 
     return sessions
 
+# Summarize a chunk's sessions as its first/last timestamp and the session breaks inside it
+def session_boundaries(df):
+    timestamps = df['timestamp'].sort_values()
+    breaks = int((timestamps.diff() > SESSION_GAP).sum())
+    return {'first': timestamps.iloc[0], 'last': timestamps.iloc[-1], 'breaks': breaks}
+
+# Stitch the sessions of two consecutive chunks, adding a break if the gap between them is too long
+def merge_session_boundaries(total, partial):
+    if total is None:
+        return partial
+    if partial['first'] < total['last']:
+        raise ValueError("Chunks overlap in time; the cleaned data must be sorted by timestamp "
+                         "(re-run data_preparation.py)")
+    breaks = total['breaks'] + partial['breaks'] + int(partial['first'] - total['last'] > SESSION_GAP)
+    return {'first': total['first'], 'last': partial['last'], 'breaks': breaks}
+
+# Count sessions without materializing them; same count as len(detect_binge_watching(df))
+def count_sessions(boundaries):
+    return boundaries['breaks'] + 1
+
+# Count videos per day/week/month; counts from separate chunks can be merged
+def count_viewing_periods(df):
+    return {
+        'daily': df.groupby(df['timestamp'].dt.date)['title'].count(),
+        'weekly': df.groupby(df['timestamp'].dt.to_period('W'))['title'].count(),
+        'monthly': df.groupby(df['timestamp'].dt.to_period('M'))['title'].count()
+    }
+
+# Average the per-period counts
+def averages_from_counts(counts):
+    return counts['daily'].mean(), counts['weekly'].mean(), counts['monthly'].mean()
+
 # Calculate average videos watched per day/week/month
 def calculate_averages(df):
-    daily_avg = df.groupby(df['timestamp'].dt.date)['title'].count().mean()
-    weekly_avg = df.groupby(df['timestamp'].dt.to_period('W'))['title'].count().mean()
-    monthly_avg = df.groupby(df['timestamp'].dt.to_period('M'))['title'].count().mean()
-    return daily_avg, weekly_avg, monthly_avg
+    return averages_from_counts(count_viewing_periods(df))
+
+# Compute averages and session count chunk by chunk, with the same results as the in-memory path
+def analyze_chunked(chunks):
+    counts = None
+    boundaries = None
+    rows = 0
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        partial = count_viewing_periods(chunk)
+        counts = partial if counts is None else {key: merge_counts(counts[key], partial[key]) for key in partial}
+        boundaries = merge_session_boundaries(boundaries, session_boundaries(chunk))
+        rows += len(chunk)
+    require_rows(rows)
+    return averages_from_counts(counts), count_sessions(boundaries), rows
 
 # Main function to perform analysis
 def main():
-    df = load_data()
+    # Stream the data in chunks when --chunk-size is given
+    rows_per_chunk = chunk_size()
+    if rows_per_chunk:
+        with track('chunked_groupby') as metrics:
+            (daily_avg, weekly_avg, monthly_avg), sessions_count, metrics['rows'] = analyze_chunked(
+                iter_chunks(input_file, rows_per_chunk, columns=['title', 'timestamp']))
+            metrics['bytes_read'] = os.path.getsize(input_file)
+    else:
+        with track('load') as metrics:
+            df = load_data()
+            metrics['rows'] = len(df)
+            metrics['bytes_read'] = os.path.getsize(input_file)
 
-    # Calculate averages
-    daily_avg, weekly_avg, monthly_avg = calculate_averages(df)
+        # Calculate averages
+        with track('groupby') as metrics:
+            daily_avg, weekly_avg, monthly_avg = calculate_averages(df)
+            metrics['rows'] = len(df)
 
-    # Detect binge-watching sessions
-    binge_sessions = detect_binge_watching(df)
+        # Detect binge-watching sessions
+        with track('sessions') as metrics:
+            sessions_count = count_sessions(session_boundaries(df))
+            metrics['rows'] = len(df)
 
     results = {
         "daily_avg": daily_avg,
         "weekly_avg": weekly_avg,
         "monthly_avg": monthly_avg,
-        "binge_sessions_count": len(binge_sessions),
+        "binge_sessions_count": sessions_count,
     }
 
     # Save results to output directory
     os.makedirs(output_dir, exist_ok=True)
-    with open(os.path.join(output_dir, 'behavioral_insights.txt'), 'w') as file:
-        for key, value in results.items():
-            file.write(f"{key}: {value}\n")
+    with track('save', output_dir=output_dir):
+        with open(os.path.join(output_dir, 'behavioral_insights.txt'), 'w') as file:
+            for key, value in results.items():
+                file.write(f"{key}: {value}\n")
 
     print(f"Behavioral analysis completed. Results saved to {output_dir}")
 
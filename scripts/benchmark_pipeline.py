@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmark Suite
+
+Generates synthetic watch histories at several sizes, runs every pipeline
+stage against each one in a fresh process and records wall time, CPU time
+and peak memory. The channel sketches are also checked against exact
+counts on each dataset. Results are written as JSON and can be compared
+with a previous run to spot regressions.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import resource
+import subprocess
+import tempfile
+from datetime import datetime
+
+from pipeline_paths import PIPELINE_STAGES, prepare_project_dir, project_path, load_stage
+from stage_options import NO_PLOTS_VAR
+
+# Output paths and default sizes
+output_dir = os.path.expanduser('~/Developer/youtube-analysis/output/benchmarks')
+results_file = os.path.join(output_dir, 'benchmark_results.json')
+DEFAULT_SIZES = [10000, 1000000, 10000000]
+
+# Stages slower than this fraction over the baseline are flagged
+REGRESSION_THRESHOLD = 0.10
+
+# Heavy rendering libraries whose import cost --no-plots avoids
+PLOTTING_MODULES = ['matplotlib', 'seaborn', 'wordcloud']
+
+def peak_rss_mb():
+    """Peak resident set size of this process in megabytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def run_stage(stage, project_dir):
+    """Run one stage in this process and return its measurements."""
+    import_started = time.perf_counter()
+    module = load_stage(stage, project_dir)
+    import_seconds = time.perf_counter() - import_started
+    rss_before = peak_rss_mb()
+
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    module.main()
+
+    return {
+        'stage': stage,
+        'import_seconds': round(import_seconds, 4),
+        'wall_seconds': round(time.perf_counter() - wall_started, 4),
+        'cpu_seconds': round(time.process_time() - cpu_started, 4),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'rss_after_import_mb': round(rss_before, 1),
+        'plotting_modules_loaded': [name for name in PLOTTING_MODULES if name in sys.modules]
+    }
+
+def measure_stage(stage, project_dir, plots=True):
+    """Run a stage in a fresh interpreter so memory and imports are measured in isolation."""
+    command = [sys.executable, os.path.abspath(__file__), '--run-stage', stage, '--project-dir', project_dir]
+    env = dict(os.environ, MPLBACKEND='Agg')
+    if not plots:
+        env[NO_PLOTS_VAR] = '1'
+    completed = subprocess.run(command, capture_output=True, text=True, env=env,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+    if completed.returncode != 0:
+        print(f"❌ {stage} failed:\n{completed.stderr}")
+        return {'stage': stage, 'error': completed.stderr.strip().splitlines()[-1:]}
+    # The measurement is the last line; anything before it is the stage's own output
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def sketch_accuracy(project_dir, rows):
+    """Compare the --sketch channel results with exact counts on the cleaned data."""
+    content = load_stage('content_analysis', project_dir)
+    df = content.extract_channel_names(content.load_data())
+    sketches = content.update_channel_sketches(content.new_channel_sketches(), df)
+    exact_overall, _ = content.analyze_top_channels(df)
+    approximate_overall, _ = content.top_channels_from_sketches(sketches)
+    exact_counts = df['extracted_channel'].value_counts()
+
+    distinct_channels = int(exact_counts.size)
+    distinct_titles = int(df['title'].nunique())
+    return {
+        'rows': rows,
+        'top20_recall': len(set(exact_overall.index) & set(approximate_overall.index)) / max(len(exact_overall), 1),
+        'top20_max_overcount': int((approximate_overall - exact_counts.reindex(approximate_overall.index, fill_value=0)).max()),
+        'top20_overcount_bound': sketches['overall'].max_error(),
+        'distinct_channels_exact': distinct_channels,
+        'distinct_channels_estimate': sketches['distinct_channels'].count(),
+        'distinct_channels_error': sketches['distinct_channels'].count() / max(distinct_channels, 1) - 1,
+        'distinct_titles_exact': distinct_titles,
+        'distinct_titles_estimate': sketches['distinct_titles'].count(),
+        'distinct_titles_error': sketches['distinct_titles'].count() / max(distinct_titles, 1) - 1,
+        'distinct_relative_error': sketches['distinct_titles'].relative_error()
+    }
+
+def benchmark_size(rows, work_dir, seed, plots=True):
+    """Generate a dataset of the given size and benchmark every stage on it."""
+    from synthetic_data import generate_watch_history, write_takeout_files
+
+    project_dir = os.path.join(work_dir, f'rows_{rows}')
+    prepare_project_dir(project_dir)
+
+    started = time.perf_counter()
+    history = generate_watch_history(rows, seed=seed)
+    write_takeout_files(history, project_path(project_dir, 'data/UserData_YouTube'))
+    del history
+    print(f"Generated {rows} rows in {time.perf_counter() - started:.1f}s")
+
+    results = []
+    for stage in PIPELINE_STAGES:
+        measurement = measure_stage(stage, project_dir, plots)
+        measurement['rows'] = rows
+        measurement['plots'] = plots
+        results.append(measurement)
+        if 'error' not in measurement:
+            print(f"  {stage:<24} {measurement['import_seconds']:>7.2f}s import "
+                  f"{measurement['wall_seconds']:>9.2f}s wall "
+                  f"{measurement['cpu_seconds']:>9.2f}s cpu {measurement['peak_rss_mb']:>9.1f} MB")
+
+    accuracy = sketch_accuracy(project_dir, rows)
+    print(f"  Sketch vs exact: top-20 recall {accuracy['top20_recall']:.0%}, "
+          f"max overcount {accuracy['top20_max_overcount']} (bound {accuracy['top20_overcount_bound']:.0f}), "
+          f"distinct titles {accuracy['distinct_titles_error']:+.2%}, "
+          f"distinct channels {accuracy['distinct_channels_error']:+.2%}")
+    return results, accuracy
+
+def compare_results(results, baseline):
+    """Print per-stage changes against a baseline run and return the regressions."""
+    previous = {(r['rows'], r['stage'], r.get('plots', True)): r for r in baseline['results'] if 'error' not in r}
+    regressions = []
+    print(f"\nComparison with baseline from {baseline.get('generated_at', 'unknown')}:")
+    for result in results:
+        key = (result['rows'], result['stage'], result['plots'])
+        if 'error' in result or key not in previous:
+            continue
+        change = result['wall_seconds'] / max(previous[key]['wall_seconds'], 1e-9) - 1
+        memory_change = result['peak_rss_mb'] / max(previous[key]['peak_rss_mb'], 1e-9) - 1
+        flag = '⚠️ ' if change > REGRESSION_THRESHOLD else '  '
+        print(f"{flag}{result['rows']:>10} {result['stage']:<24} time {change:+.1%}  memory {memory_change:+.1%}")
+        if change > REGRESSION_THRESHOLD:
+            regressions.append(key)
+    return regressions
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description='Benchmark the YouTube analysis pipeline on synthetic data')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Row counts to benchmark')
+    parser.add_argument('--output', default=results_file, help='JSON file for the results')
+    parser.add_argument('--baseline', help='Previous results file to compare against')
+    parser.add_argument('--work-dir', help='Keep generated data here instead of a temporary directory')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-plots', action='store_true', help='Benchmark stages without rendering charts')
+    parser.add_argument('--run-stage', help=argparse.SUPPRESS)
+    parser.add_argument('--project-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Child mode: run a single stage and report its measurements as JSON
+    if args.run_stage:
+        print(json.dumps(run_stage(args.run_stage, args.project_dir)))
+        return
+
+    # Read the baseline first in case it is also the output file
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='youtube_benchmark_')
+    results = []
+    accuracy = []
+    try:
+        for rows in args.sizes:
+            print(f"\nBenchmarking {rows} rows")
+            size_results, size_accuracy = benchmark_size(rows, work_dir, args.seed, plots=not args.no_plots)
+            results.extend(size_results)
+            accuracy.append(size_accuracy)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'results': results,
+        'sketch_accuracy': accuracy
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nBenchmark results saved to {args.output}")
+
+    if baseline:
+        regressions = compare_results(results, baseline)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} stage(s) slower than baseline by more than {REGRESSION_THRESHOLD:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,25 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from wordcloud import WordCloud
+import numpy as np
 import re
+import json
 from collections import Counter
 import os
 
+from instrumentation import track
+from out_of_core import iter_chunks, merge_counts, available_columns, require_rows
+from sketches import SpaceSaving, CountMinSketch, HyperLogLog, save_sketch
+from stage_options import plots_enabled, chunk_size, sketch_mode
+
 # Input and output paths
 input_file = os.path.expanduser('~/Developer/youtube-analysis/output/cleaned_watch_history.csv')
 output_dir = os.path.expanduser('~/Developer/youtube-analysis/output/content_analysis')
 
+# Channels tracked by each heavy-hitter sketch; reported counts are off by at most rows / capacity
+SKETCH_CAPACITY = 1000
+
+# Common words left out of the word cloud
+STOP_WORDS = {'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'shall', 'can', 'a', 'an', 'this', 'that', 'these', 'those'}
+
 def load_data():
     """Load the cleaned watch history data."""
     df = pd.read_csv(input_file)
@@ -17,30 +27,37 @@ def load_data():
     df['year'] = df['timestamp'].dt.year
     return df
 
+def guess_channel(title):
+    """Guess a channel name from a video title using common patterns."""
+    # Common patterns for channel extraction
+    # Pattern 1: "Channel Name - Video Title"
+    if ' - ' in title:
+        return title.split(' - ')[0]
+    # Pattern 2: "Video Title | Channel Name"
+    elif ' | ' in title:
+        return title.split(' | ')[-1]
+    # Pattern 3: "Channel Name: Video Title"
+    elif ': ' in title and len(title.split(': ')[0]) < 50:
+        return title.split(': ')[0]
+    else:
+        # Extract first few words as potential channel
+        return ' '.join(title.split()[:3])
+
 def extract_channel_names(df):
-    """Extract channel names from video titles using common patterns."""
-    channels = []
-    
-    for title in df['title']:
-        # Common patterns for channel extraction
-        # Pattern 1: "Channel Name - Video Title"
-        if ' - ' in title:
-            potential_channel = title.split(' - ')[0]
-            channels.append(potential_channel)
-        # Pattern 2: "Video Title | Channel Name"
-        elif ' | ' in title:
-            potential_channel = title.split(' | ')[-1]
-            channels.append(potential_channel)
-        # Pattern 3: "Channel Name: Video Title"
-        elif ': ' in title and len(title.split(': ')[0]) < 50:
-            potential_channel = title.split(': ')[0]
-            channels.append(potential_channel)
-        else:
-            # Extract first few words as potential channel
-            words = title.split()[:3]
-            channels.append(' '.join(words))
+    """Attach each video's channel: the real channel from the export where known, otherwise one guessed from the title."""
+    if 'channel_name' in df:
+        channels = df['channel_name'].astype(object)
+    else:
+        channels = pd.Series(None, index=df.index, dtype=object)
+    
+    # Titles are only parsed for entries without a real channel, once per distinct title
+    unknown = channels.isna().to_numpy()
+    if unknown.any():
+        codes, titles = pd.factorize(df['title'][unknown])
+        guesses = np.array([guess_channel(title) for title in titles], dtype=object)
+        channels[unknown] = guesses[codes]
     
-    df['extracted_channel'] = channels
+    df['extracted_channel'] = channels.to_numpy()
     return df
 
 def categorize_content(df):
@@ -71,21 +88,83 @@ def categorize_content(df):
     df['categories'] = df['title'].apply(categorize_title)
     return df
 
-def analyze_top_channels(df):
-    """Analyze top channels/creators by view count."""
-    channel_counts = df['extracted_channel'].value_counts()
-    
+def count_channels(df):
+    """Count videos per (year, channel); counts from separate chunks can be merged."""
+    return df.groupby(['year', 'extracted_channel']).size()
+
+def rank_channels(counts, n):
+    """Top n channels by count, ties broken by channel name."""
+    return counts.sort_index().sort_values(ascending=False, kind='stable').head(n).rename('count')
+
+def top_channels_from_counts(channel_counts):
+    """Rank channels overall and per year from (year, channel) counts."""
     # Overall top channels
-    top_channels_overall = channel_counts.head(20)
+    top_channels_overall = rank_channels(channel_counts.groupby(level='extracted_channel').sum(), 20)
     
     # Top channels by year
     top_channels_by_year = {}
-    for year in df['year'].unique():
-        year_data = df[df['year'] == year]
-        top_channels_by_year[year] = year_data['extracted_channel'].value_counts().head(10)
+    for year, year_counts in channel_counts.groupby(level='year'):
+        top_channels_by_year[year] = rank_channels(year_counts.droplevel('year'), 10)
     
     return top_channels_overall, top_channels_by_year
 
+def analyze_top_channels(df):
+    """Analyze top channels/creators by view count."""
+    return top_channels_from_counts(count_channels(df))
+
+def new_channel_sketches():
+    """Empty sketches for approximate channel and title analytics."""
+    return {
+        'overall': SpaceSaving(SKETCH_CAPACITY),
+        'by_year': {},
+        'frequency': CountMinSketch(),
+        'distinct_channels': HyperLogLog(),
+        'distinct_titles': HyperLogLog()
+    }
+
+def update_channel_sketches(sketches, df):
+    """Add one chunk's channels and titles to the sketches."""
+    sketches['overall'].add(df['extracted_channel'])
+    for year, channels in df.groupby('year')['extracted_channel']:
+        sketches['by_year'].setdefault(year, SpaceSaving(SKETCH_CAPACITY)).add(channels)
+    sketches['frequency'].add(df['extracted_channel'])
+    sketches['distinct_channels'].add(df['extracted_channel'])
+    sketches['distinct_titles'].add(df['title'])
+    return sketches
+
+def top_channels_from_sketches(sketches):
+    """Approximate top channels overall and per year from the heavy-hitter sketches."""
+    def ranked(sketch, n):
+        return sketch.top(n).rename('count').rename_axis('extracted_channel')
+    
+    top_channels_overall = ranked(sketches['overall'], 20)
+    top_channels_by_year = {year: ranked(sketch, 10) for year, sketch in sorted(sketches['by_year'].items())}
+    return top_channels_overall, top_channels_by_year
+
+def save_channel_sketches(sketches):
+    """Persist the sketches so they can be merged with other files, years or accounts."""
+    sketch_dir = os.path.join(output_dir, 'sketches')
+    os.makedirs(sketch_dir, exist_ok=True)
+    
+    save_sketch(sketches['overall'], os.path.join(sketch_dir, 'channels_overall.json'))
+    for year, sketch in sketches['by_year'].items():
+        save_sketch(sketch, os.path.join(sketch_dir, f'channels_{year}.json'))
+    save_sketch(sketches['frequency'], os.path.join(sketch_dir, 'channel_frequency.json'))
+    save_sketch(sketches['distinct_channels'], os.path.join(sketch_dir, 'distinct_channels.json'))
+    save_sketch(sketches['distinct_titles'], os.path.join(sketch_dir, 'distinct_titles.json'))
+    
+    summary = {
+        'rows': sketches['overall'].total,
+        'distinct_channels_estimate': sketches['distinct_channels'].count(),
+        'distinct_titles_estimate': sketches['distinct_titles'].count(),
+        'distinct_relative_error': sketches['distinct_channels'].relative_error(),
+        'top_channel_max_overcount': sketches['overall'].max_error(),
+        'channel_frequency_max_overcount': sketches['frequency'].max_error()
+    }
+    with open(os.path.join(sketch_dir, 'sketch_summary.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
 def analyze_content_categories(df):
     """Analyze content category preferences."""
     # Flatten categories list
@@ -106,28 +185,86 @@ def analyze_content_categories(df):
     
     return category_counts, category_by_year
 
-def create_word_cloud(df):
-    """Create word cloud from video titles."""
-    # Combine all titles
-    all_titles = ' '.join(df['title'].tolist())
-    
-    # Remove common stop words and clean text
-    stop_words = {'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'shall', 'can', 'a', 'an', 'this', 'that', 'these', 'those'}
+def merge_category_counts(total, partial):
+    """Combine the category counts of two chunks, keeping first-seen order."""
+    if total is None:
+        return partial
+    category_counts, category_by_year = total
+    category_counts.update(partial[0])
+    for year, counts in partial[1].items():
+        category_by_year.setdefault(year, Counter()).update(counts)
+    return category_counts, category_by_year
+
+def make_word_cloud():
+    """Create an empty word cloud with the project's settings."""
+    from wordcloud import WordCloud
     
-    wordcloud = WordCloud(
+    return WordCloud(
         width=1200, 
         height=600, 
         background_color='white',
-        stopwords=stop_words,
+        stopwords=STOP_WORDS,
         max_words=100,
         relative_scaling=0.5,
         colormap='viridis'
-    ).generate(all_titles)
+    )
+
+def create_word_cloud(df):
+    """Create word cloud from video titles."""
+    # Combine all titles
+    all_titles = ' '.join(df['title'].tolist())
+    
+    return make_word_cloud().generate(all_titles)
+
+def prepare_chunk(chunk):
+    """Add the year, channel and category columns to one chunk."""
+    chunk['year'] = chunk['timestamp'].dt.year
+    return categorize_content(extract_channel_names(chunk))
+
+def analyze_content_chunked(chunks, with_word_cloud=True, sketches=None):
+    """Analyze content chunk by chunk, keeping only mergeable counts in memory.
+    
+    Channel and category results match the in-memory path exactly. Word
+    frequencies are tokenized per chunk and summed, so the word cloud can
+    differ marginally from one generated over all titles at once. When
+    sketches are given, channels are ranked from them instead of exact counts.
+    
+    Returns:
+        tuple: (top channels overall, top channels by year, category counts,
+                categories by year, word cloud or None, rows processed)
+    """
+    channel_counts = None
+    category_totals = None
+    word_frequencies = Counter()
+    word_cloud = make_word_cloud() if with_word_cloud else None
+    rows = 0
     
-    return wordcloud
+    for chunk in chunks:
+        chunk = prepare_chunk(chunk)
+        if sketches is not None:
+            update_channel_sketches(sketches, chunk)
+        else:
+            channel_counts = merge_counts(channel_counts, count_channels(chunk))
+        category_totals = merge_category_counts(category_totals, analyze_content_categories(chunk))
+        if word_cloud is not None:
+            word_frequencies.update(word_cloud.process_text(' '.join(chunk['title'].tolist())))
+        rows += len(chunk)
+    require_rows(rows)
+    
+    if sketches is not None:
+        top_channels_overall, top_channels_by_year = top_channels_from_sketches(sketches)
+    else:
+        top_channels_overall, top_channels_by_year = top_channels_from_counts(channel_counts)
+    category_counts, category_by_year = category_totals
+    if word_cloud is not None:
+        word_cloud.generate_from_frequencies(word_frequencies)
+    return top_channels_overall, top_channels_by_year, category_counts, category_by_year, word_cloud, rows
 
-def create_visualizations(df, top_channels_overall, category_counts, wordcloud):
+def create_visualizations(top_channels_overall, category_counts, wordcloud):
     """Create visualizations for content analysis."""
+    # Plotting libraries are only imported when charts are rendered
+    import matplotlib.pyplot as plt
+    import seaborn as sns
     
     # Set up the plotting style
     plt.style.use('default')
@@ -190,23 +327,63 @@ def main():
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
     
-    # Load and process data
-    df = load_data()
-    df = extract_channel_names(df)
-    df = categorize_content(df)
-    
-    # Analyze content
-    top_channels_overall, top_channels_by_year = analyze_top_channels(df)
-    category_counts, category_by_year = analyze_content_categories(df)
+    # Approximate channel analytics with mergeable sketches when --sketch is given
+    sketches = new_channel_sketches() if sketch_mode() else None
     
-    # Create word cloud
-    wordcloud = create_word_cloud(df)
+    # Stream the data in chunks when --chunk-size is given
+    rows_per_chunk = chunk_size()
+    if rows_per_chunk:
+        with track('chunked_groupby') as metrics:
+            (top_channels_overall, top_channels_by_year, category_counts, category_by_year,
+             wordcloud, metrics['rows']) = analyze_content_chunked(
+                iter_chunks(input_file, rows_per_chunk,
+                            columns=['title', 'timestamp'] + available_columns(input_file, ['channel_name'])),
+                plots_enabled(), sketches)
+            metrics['bytes_read'] = os.path.getsize(input_file)
+    else:
+        # Load and process data
+        with track('load') as metrics:
+            df = load_data()
+            metrics['rows'] = len(df)
+            metrics['bytes_read'] = os.path.getsize(input_file)
+        with track('extract_channels') as metrics:
+            df = extract_channel_names(df)
+            metrics['rows'] = len(df)
+        with track('categorize') as metrics:
+            df = categorize_content(df)
+            metrics['rows'] = len(df)
+        
+        # Analyze content
+        with track('groupby') as metrics:
+            if sketches is not None:
+                top_channels_overall, top_channels_by_year = top_channels_from_sketches(
+                    update_channel_sketches(sketches, df))
+            else:
+                top_channels_overall, top_channels_by_year = analyze_top_channels(df)
+            category_counts, category_by_year = analyze_content_categories(df)
+            metrics['rows'] = len(df)
+        
+        if plots_enabled():
+            with track('wordcloud') as metrics:
+                wordcloud = create_word_cloud(df)
+                metrics['rows'] = len(df)
     
     # Create visualizations
-    create_visualizations(df, top_channels_overall, category_counts, wordcloud)
+    if plots_enabled():
+        with track('render', output_dir=output_dir):
+            create_visualizations(top_channels_overall, category_counts, wordcloud)
     
     # Save results
-    save_results(top_channels_overall, top_channels_by_year, category_counts, category_by_year)
+    with track('save', output_dir=output_dir):
+        save_results(top_channels_overall, top_channels_by_year, category_counts, category_by_year)
+        if sketches is not None:
+            summary = save_channel_sketches(sketches)
+    
+    if sketches is not None:
+        print(f"Sketch estimates: ~{summary['distinct_channels_estimate']} distinct channels, "
+              f"~{summary['distinct_titles_estimate']} distinct titles "
+              f"(±{summary['distinct_relative_error']:.1%}); top channel counts overestimate by at most "
+              f"{summary['top_channel_max_overcount']:.0f}")
     
     print(f"Content analysis completed. Results saved to {output_dir}")
     print(f"Top channel: {top_channels_overall.index[0]} ({top_channels_overall.iloc[0]} videos)")
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Interactive Dashboard
+
+Builds a single self-contained HTML file from aggregates the temporal and
+content stages have already written: the year x day x hour viewing cube,
+category counts per year and the top channels overall and per year. The
+aggregates are embedded as compact JSON and all filtering and drill-down
+happens in the browser, so the file works offline and nothing is
+re-plotted. Only the standard library is used, which keeps generation to
+a few milliseconds.
+"""
+
+import os
+import csv
+import json
+from datetime import datetime
+
+from instrumentation import track
+
+# Input and output paths
+temporal_dir = os.path.expanduser('~/Developer/youtube-analysis/output/temporal_analysis')
+content_dir = os.path.expanduser('~/Developer/youtube-analysis/output/content_analysis')
+output_file = os.path.expanduser('~/Developer/youtube-analysis/output/reports/dashboard.html')
+
+HOURS_PER_WEEK = 7 * 24
+
+def read_rows(path):
+    """Rows of a CSV file as lists of strings, without the header; [] if the file is missing."""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    return rows[1:]
+
+def load_cube():
+    """Hour-by-day counts per year as {'years': [...], 'counts': [[168 counts] per year]}.
+
+    Falls back to a single all-years slice when only day_hour_analysis.csv exists.
+    """
+    rows = read_rows(os.path.join(temporal_dir, 'year_day_hour_analysis.csv'))
+    if not rows:
+        rows = [['All'] + row for row in read_rows(os.path.join(temporal_dir, 'day_hour_analysis.csv'))]
+    years = sorted({row[0] for row in rows})
+    position = {year: i for i, year in enumerate(years)}
+    counts = [[0] * HOURS_PER_WEEK for _ in years]
+    for year, day, hour, count in rows:
+        counts[position[year]][int(day) * 24 + int(hour)] = int(count)
+    return {'years': years, 'counts': counts}
+
+def load_categories():
+    """Category counts per year as {'years', 'names', 'counts': [[per category] per year]}."""
+    rows = read_rows(os.path.join(content_dir, 'category_evolution_by_year.csv'))
+    years = sorted({row[0] for row in rows})
+    names = sorted({row[1] for row in rows})
+    year_position = {year: i for i, year in enumerate(years)}
+    name_position = {name: i for i, name in enumerate(names)}
+    counts = [[0] * len(names) for _ in years]
+    for year, name, count in rows:
+        counts[year_position[year]][name_position[name]] = int(count)
+    return {'years': years, 'names': names, 'counts': counts}
+
+def load_channels():
+    """Top channels overall and per year as lists of [channel, count]."""
+    def ranked(path):
+        return [[row[0], int(float(row[1]))] for row in read_rows(path)]
+
+    by_year = {}
+    for filename in sorted(os.listdir(content_dir)) if os.path.isdir(content_dir) else []:
+        year = filename[len('top_channels_'):-len('.csv')]
+        if filename.startswith('top_channels_') and filename.endswith('.csv') and year.isdigit():
+            by_year[year] = ranked(os.path.join(content_dir, filename))
+    return {'overall': ranked(os.path.join(content_dir, 'top_channels_overall.csv')), 'by_year': by_year}
+
+def build_dashboard_data():
+    """Everything the dashboard shows, as one JSON-serializable dict."""
+    return {
+        'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M'),
+        'cube': load_cube(),
+        'categories': load_categories(),
+        'channels': load_channels()
+    }
+
+def render_dashboard(data):
+    """Embed the data in the HTML template."""
+    # '</' would end the script element early
+    payload = json.dumps(data, separators=(',', ':')).replace('</', '<\\/')
+    return DASHBOARD_TEMPLATE.replace('__DASHBOARD_DATA__', payload)
+
+DASHBOARD_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>YouTube Viewing Dashboard</title>
+<style>
+  body { font-family: -apple-system, "Segoe UI", Helvetica, Arial, sans-serif; margin: 24px; color: #222; background: #fafafa; }
+  h1 { margin: 0 0 4px; font-size: 22px; }
+  h2 { font-size: 16px; margin: 0 0 10px; }
+  .muted { color: #777; font-size: 13px; }
+  .controls { margin: 16px 0; display: flex; gap: 16px; align-items: center; flex-wrap: wrap; }
+  .grid { display: grid; grid-template-columns: minmax(520px, 3fr) minmax(320px, 2fr); gap: 16px; }
+  .panel { background: #fff; border: 1px solid #e3e3e3; border-radius: 6px; padding: 14px; }
+  table.heatmap { border-collapse: collapse; font-size: 11px; }
+  table.heatmap td, table.heatmap th { width: 20px; height: 20px; padding: 0; text-align: center; }
+  table.heatmap td { cursor: pointer; border: 1px solid #fff; }
+  table.heatmap th { cursor: pointer; font-weight: normal; color: #555; }
+  table.heatmap td.selected, table.heatmap th.selected { outline: 2px solid #222; }
+  .bar-row { display: flex; align-items: center; font-size: 12px; margin: 2px 0; cursor: pointer; }
+  .bar-row:hover { background: #f2f2f2; }
+  .bar-row.selected { background: #e8eefc; }
+  .bar-label { width: 150px; overflow: hidden; text-overflow: ellipsis; white-space: nowrap; }
+  .bar-track { flex: 1; margin: 0 8px; }
+  .bar { background: #d9534f; height: 12px; border-radius: 2px; }
+  .bar-value { width: 60px; text-align: right; color: #555; }
+  input[type=search] { padding: 4px 6px; width: 100%; box-sizing: border-box; margin-bottom: 8px; }
+</style>
+</head>
+<body>
+<h1>YouTube Viewing Dashboard</h1>
+<div class="muted">Generated <span id="generated"></span> from pre-aggregated pipeline outputs</div>
+
+<div class="controls">
+  <label>Year <select id="year"></select></label>
+  <span id="total" class="muted"></span>
+  <button id="clear">Clear selection</button>
+</div>
+
+<div class="grid">
+  <div class="panel">
+    <h2>When you watch</h2>
+    <div class="muted">Click a cell, day or hour to drill down</div>
+    <table class="heatmap" id="heatmap"></table>
+  </div>
+  <div class="panel">
+    <h2 id="drill-title">Watches per year</h2>
+    <div id="drill"></div>
+  </div>
+  <div class="panel">
+    <h2>Content categories</h2>
+    <div class="muted">Titles can be in several categories; click one for its trend by year</div>
+    <div id="categories"></div>
+  </div>
+  <div class="panel">
+    <h2 id="channels-title">Top channels</h2>
+    <input type="search" id="channel-filter" placeholder="Filter channels">
+    <div id="channels"></div>
+  </div>
+</div>
+
+<script id="dashboard-data" type="application/json">__DASHBOARD_DATA__</script>
+<script>
+(function () {
+  var data = JSON.parse(document.getElementById('dashboard-data').textContent);
+  var DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'];
+  var state = { year: 'All', day: null, hour: null, category: null };
+
+  function sum(values) { return values.reduce(function (a, b) { return a + b; }, 0); }
+
+  function el(tag, attributes, text) {
+    var node = document.createElement(tag);
+    Object.keys(attributes || {}).forEach(function (key) { node.setAttribute(key, attributes[key]); });
+    if (text !== undefined) { node.textContent = text; }
+    return node;
+  }
+
+  // Hour-by-day counts for the selected year (or all years), 168 values
+  function cubeSlice() {
+    var cube = data.cube;
+    var counts = new Array(168).fill(0);
+    cube.years.forEach(function (year, i) {
+      if (state.year === 'All' || state.year === year) {
+        cube.counts[i].forEach(function (count, cell) { counts[cell] += count; });
+      }
+    });
+    return counts;
+  }
+
+  // Count of the selected cell, day, hour or everything in each year
+  function perYear() {
+    return data.cube.years.map(function (year, i) {
+      var counts = data.cube.counts[i];
+      var total = 0;
+      for (var cell = 0; cell < 168; cell++) {
+        var day = Math.floor(cell / 24), hour = cell % 24;
+        if ((state.day === null || state.day === day) && (state.hour === null || state.hour === hour)) {
+          total += counts[cell];
+        }
+      }
+      return [year, total];
+    });
+  }
+
+  function bars(container, items, selected, onClick) {
+    container.innerHTML = '';
+    var max = Math.max.apply(null, items.map(function (item) { return item[1]; }).concat([1]));
+    items.forEach(function (item) {
+      var row = el('div', { 'class': 'bar-row' + (item[0] === selected ? ' selected' : ''), title: item[0] + ': ' + item[1] });
+      row.appendChild(el('div', { 'class': 'bar-label' }, item[0]));
+      var track = el('div', { 'class': 'bar-track' });
+      var bar = el('div', { 'class': 'bar' });
+      bar.style.width = (100 * item[1] / max) + '%';
+      track.appendChild(bar);
+      row.appendChild(track);
+      row.appendChild(el('div', { 'class': 'bar-value' }, item[1].toLocaleString()));
+      if (onClick) { row.addEventListener('click', function () { onClick(item[0]); }); }
+      container.appendChild(row);
+    });
+  }
+
+  function renderHeatmap(counts) {
+    var table = document.getElementById('heatmap');
+    table.innerHTML = '';
+    var max = Math.max.apply(null, counts.concat([1]));
+    var header = el('tr');
+    header.appendChild(el('th'));
+    for (var hour = 0; hour < 24; hour++) {
+      var th = el('th', { 'class': state.hour === hour && state.day === null ? 'selected' : '' }, hour);
+      th.addEventListener('click', select.bind(null, null, hour));
+      header.appendChild(th);
+    }
+    table.appendChild(header);
+    DAYS.forEach(function (name, day) {
+      var row = el('tr');
+      var label = el('th', { 'class': state.day === day && state.hour === null ? 'selected' : '' }, name);
+      label.addEventListener('click', select.bind(null, day, null));
+      row.appendChild(label);
+      for (var hour = 0; hour < 24; hour++) {
+        var count = counts[day * 24 + hour];
+        var cell = el('td', { title: name + ' ' + hour + ':00 - ' + count.toLocaleString() + ' videos' });
+        if (state.day === day && state.hour === hour) { cell.className = 'selected'; }
+        cell.style.background = 'rgba(217, 83, 79, ' + (0.05 + 0.95 * count / max).toFixed(3) + ')';
+        cell.addEventListener('click', select.bind(null, day, hour));
+        row.appendChild(cell);
+      }
+      table.appendChild(row);
+    });
+  }
+
+  function renderDrill(counts) {
+    var container = document.getElementById('drill');
+    var title = document.getElementById('drill-title');
+    var items;
+    var onClick = null;
+    if (state.day !== null && state.hour === null) {
+      title.textContent = DAYS[state.day] + ' by hour';
+      items = counts.slice(state.day * 24, state.day * 24 + 24).map(function (count, hour) { return [hour + ':00', count]; });
+    } else if (state.hour !== null && state.day === null) {
+      title.textContent = state.hour + ':00 by day';
+      items = DAYS.map(function (name, day) { return [name, counts[day * 24 + state.hour]]; });
+    } else {
+      // Nothing or a single cell selected: its count in every year, click a year to filter by it
+      title.textContent = (state.day !== null ? DAYS[state.day] + ' ' + state.hour + ':00' : 'Watches') + ' per year';
+      items = perYear();
+      onClick = function (year) { setYear(state.year === year ? 'All' : year); };
+    }
+    bars(container, items, state.year, onClick);
+  }
+
+  function renderCategories() {
+    var categories = data.categories;
+    var container = document.getElementById('categories');
+    if (state.category !== null) {
+      var column = categories.names.indexOf(state.category);
+      var items = categories.years.map(function (year, i) { return [year, categories.counts[i][column]]; });
+      container.innerHTML = '';
+      var back = el('div', { 'class': 'bar-row' }, '\\u2190 ' + state.category + ' by year (back to all categories)');
+      back.addEventListener('click', function () { state.category = null; render(); });
+      container.appendChild(back);
+      var trend = el('div');
+      container.appendChild(trend);
+      bars(trend, items, state.year, function (year) { setYear(state.year === year ? 'All' : year); });
+      return;
+    }
+    var totals = categories.names.map(function (name, column) {
+      return [name, sum(categories.years.map(function (year, i) {
+        return state.year === 'All' || state.year === year ? categories.counts[i][column] : 0;
+      }))];
+    }).sort(function (a, b) { return b[1] - a[1]; });
+    bars(container, totals, null, function (name) { state.category = name; render(); });
+  }
+
+  function renderChannels() {
+    var channels = state.year === 'All' ? data.channels.overall : (data.channels.by_year[state.year] || []);
+    var filter = document.getElementById('channel-filter').value.toLowerCase();
+    document.getElementById('channels-title').textContent = 'Top channels' + (state.year === 'All' ? '' : ' in ' + state.year);
+    bars(document.getElementById('channels'), channels.filter(function (item) {
+      return item[0].toLowerCase().indexOf(filter) !== -1;
+    }), null, null);
+  }
+
+  function render() {
+    var counts = cubeSlice();
+    document.getElementById('total').textContent = sum(counts).toLocaleString() + ' videos';
+    renderHeatmap(counts);
+    renderDrill(counts);
+    renderCategories();
+    renderChannels();
+  }
+
+  function select(day, hour) {
+    var same = state.day === day && state.hour === hour;
+    state.day = same ? null : day;
+    state.hour = same ? null : hour;
+    render();
+  }
+
+  function setYear(year) {
+    state.year = year;
+    document.getElementById('year').value = year;
+    render();
+  }
+
+  var years = document.getElementById('year');
+  ['All'].concat(data.cube.years.filter(function (year) { return year !== 'All'; })).forEach(function (year) {
+    years.appendChild(el('option', { value: year }, year === 'All' ? 'All years' : year));
+  });
+  years.addEventListener('change', function () { setYear(years.value); });
+  document.getElementById('channel-filter').addEventListener('input', renderChannels);
+  document.getElementById('clear').addEventListener('click', function () {
+    state = { year: 'All', day: null, hour: null, category: null };
+    document.getElementById('channel-filter').value = '';
+    setYear('All');
+  });
+  document.getElementById('generated').textContent = data.generated_at;
+  render();
+})();
+</script>
+</body>
+</html>
+"""
+
+def main():
+    """Main execution function."""
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    with track('load') as metrics:
+        data = build_dashboard_data()
+        metrics['rows'] = len(data['cube']['years']) * HOURS_PER_WEEK
+    with track('save', output_dir=os.path.dirname(output_file)) as metrics:
+        html = render_dashboard(data)
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(html)
+        metrics['bytes_written'] = len(html.encode('utf-8'))
+
+    print(f"Dashboard generated: {output_file}")
+    if not data['cube']['years']:
+        print("Warning: no temporal aggregates found; run temporal_analysis.py and content_analysis.py first")
+
+if __name__ == "__main__":
+    main()
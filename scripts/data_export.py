@@ -1,17 +1,30 @@
 import pandas as pd
+import numpy as np
 import json
 import os
 from datetime import datetime
 
+from instrumentation import track
+
 # Input and output paths
 input_file = os.path.expanduser('~/Developer/youtube-analysis/output/cleaned_watch_history.csv')
 output_dir = os.path.expanduser('~/Developer/youtube-analysis/output')
 exports_dir = os.path.join(output_dir, 'exports')
+index_file = os.path.join(exports_dir, 'title_index.json')
+
+# Repetitive ID and name columns stored as integer-coded categoricals (dictionary-encoded in Parquet)
+CATEGORY_COLUMNS = ['video_id', 'channel_id', 'channel_name']
+
+# Word tokens used by the title search index
+TOKEN_PATTERN = r'\w+'
 
 def load_data():
     """Load the cleaned watch history data."""
     df = pd.read_csv(input_file)
     df['timestamp'] = pd.to_datetime(df['timestamp'])
+    for column in CATEGORY_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype('category')
     return df
 
 def export_to_multiple_formats(df):
@@ -49,6 +62,55 @@ def export_to_multiple_formats(df):
     with open(os.path.join(exports_dir, 'dataset_summary.json'), 'w') as f:
         json.dump(summary_stats, f, indent=2)
 
+def build_title_index(df):
+    """Build an inverted index mapping title tokens to the rows that contain them.
+
+    Args:
+        df: DataFrame containing cleaned watch history data
+
+    Returns:
+        dict: Posting lists of row IDs per token plus per-row watch counts for ranking
+    """
+    df = df.reset_index(drop=True)
+    titles = df['title'].fillna('').astype(str)
+
+    # One (token, row) pair per distinct word in each title
+    tokens = titles.str.lower().str.findall(TOKEN_PATTERN).explode().dropna()
+    pairs = pd.DataFrame({'token': tokens.values, 'row': tokens.index.values.astype(np.int64)})
+    pairs = pairs.drop_duplicates().sort_values(['token', 'row'])
+
+    # Split the sorted rows into one posting list per token
+    vocabulary, starts = np.unique(pairs['token'].to_numpy(), return_index=True)
+    rows = pairs['row'].to_numpy()
+    ends = np.append(starts[1:], len(rows))
+    postings = {token: rows[start:end].tolist() for token, start, end in zip(vocabulary, starts, ends)}
+
+    # How many times each row's title was watched, used to rank search results
+    watch_counts = titles.groupby(titles).transform('size')
+
+    return {
+        'row_count': len(df),
+        'token_pattern': TOKEN_PATTERN,
+        'postings': postings,
+        'watch_counts': watch_counts.astype(int).tolist()
+    }
+
+def export_title_index(df, source_file):
+    """Build the title search index and save it next to the other exports.
+
+    Args:
+        df: DataFrame read from source_file
+        source_file: The data file the index is built from; readers only
+            trust the index while this file is unchanged
+    """
+    os.makedirs(exports_dir, exist_ok=True)
+    index = build_title_index(df)
+    index['source_mtime'] = os.path.getmtime(source_file)
+    index['source_size'] = os.path.getsize(source_file)
+    with open(index_file, 'w') as f:
+        json.dump(index, f)
+    print(f"Title index built: {len(index['postings'])} tokens over {index['row_count']} rows")
+
 def create_python_module():
     """Create a Python module for future analysis updates."""
     
@@ -60,67 +122,205 @@ Created as part of the comprehensive YouTube viewing analysis project.
 """
 
 import pandas as pd
+import numpy as np
+import json
 import os
+import re
+from bisect import bisect_left
 from datetime import datetime, timedelta
 
 class YouTubeAnalyzer:
     """Main analyzer class for YouTube watch history data."""
     
-    def __init__(self, data_file=None):
-        """Initialize with data file path."""
+    def __init__(self, data_file=None, index_file=None, columnar_file=None):
+        """Initialize with data file, title index and columnar export paths."""
         self.data_file = data_file or os.path.expanduser('~/Developer/youtube-analysis/output/cleaned_watch_history.csv')
+        exports_dir = os.path.join(os.path.dirname(self.data_file), 'exports')
+        self.index_file = index_file or os.path.join(exports_dir, 'title_index.json')
+        self.columnar_file = columnar_file or os.path.join(exports_dir, 'youtube_watch_history.parquet')
+        self._reset()
+    
+    def _reset(self):
+        """Drop loaded data and every statistic derived from it."""
         self.df = None
+        self.loaded_mtime = None
+        self.title_index = None
+        self.vocabulary = None
+        self.watch_counts = None
+        self.posting_arrays = {}
+        self._memo = {}
+    
+    def data_mtime(self):
+        """Modification time of the underlying data file."""
+        return os.path.getmtime(self.data_file)
+    
+    def _ensure_loaded(self):
+        """Load the data on first use and reload it if the data file has changed."""
+        if self.df is not None and self.loaded_mtime != self.data_mtime():
+            self._reset()
+        if self.df is None:
+            self.load_data()
+    
+    def _memoized(self, key, compute):
+        """Return a cached derived statistic, computing it on first request."""
+        self._ensure_loaded()
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
     
     def load_data(self):
-        """Load the watch history data."""
-        self.df = pd.read_csv(self.data_file)
+        """Load the watch history data.
+        
+        The Parquet export is memory-mapped when it is at least as new as the
+        CSV, otherwise the CSV is parsed.
+        """
+        mtime = self.data_mtime()
+        if os.path.exists(self.columnar_file) and os.path.getmtime(self.columnar_file) >= mtime:
+            try:
+                self.df = pd.read_parquet(self.columnar_file, memory_map=True)
+            except ImportError:
+                self.df = pd.read_csv(self.data_file)
+        else:
+            self.df = pd.read_csv(self.data_file)
         self.df['timestamp'] = pd.to_datetime(self.df['timestamp'])
+        self.loaded_mtime = mtime
         return self.df
     
     def get_viewing_stats(self):
         """Get basic viewing statistics."""
-        if self.df is None:
-            self.load_data()
-        
+        return self._memoized('viewing_stats', self._compute_viewing_stats)
+    
+    def _compute_viewing_stats(self):
+        """Compute the statistics returned by get_viewing_stats."""
+        start, end = self.df['timestamp'].min(), self.df['timestamp'].max()
         stats = {
             'total_videos': len(self.df),
-            'date_range': (self.df['timestamp'].min(), self.df['timestamp'].max()),
+            'date_range': (start, end),
             'years_covered': sorted(self.df['timestamp'].dt.year.unique()),
-            'daily_average': len(self.df) / (self.df['timestamp'].max() - self.df['timestamp'].min()).days
+            'daily_average': len(self.df) / (end - start).days
         }
         return stats
     
     def get_recent_activity(self, days=30):
         """Get recent viewing activity."""
-        if self.df is None:
-            self.load_data()
+        self._ensure_loaded()
         
         cutoff_date = self.df['timestamp'].max() - timedelta(days=days)
         recent_df = self.df[self.df['timestamp'] >= cutoff_date]
         return recent_df
     
-    def search_titles(self, keyword):
-        """Search for videos containing a keyword."""
-        if self.df is None:
-            self.load_data()
+    def get_daily_counts(self):
+        """Get the number of videos watched on each day, in date order."""
+        return self._memoized('daily_counts', lambda: self.df.groupby(self.df['timestamp'].dt.normalize()).size())
+    
+    def get_hourly_cube(self):
+        """Get video counts by day of week (rows, 0=Monday) and hour of day (columns)."""
+        return self._memoized('hourly_cube', lambda: self.df.groupby(
+            [self.df['timestamp'].dt.dayofweek, self.df['timestamp'].dt.hour]).size().unstack(fill_value=0))
+    
+    def count_between(self, start, end):
+        """Count videos watched on days from start up to but excluding end."""
+        daily = self.get_daily_counts()
+        cumulative = self._memoized('daily_cumulative', lambda: np.concatenate([[0], daily.to_numpy().cumsum()]))
+        days = daily.index.values
+        first = np.searchsorted(days, pd.Timestamp(start).normalize().to_datetime64(), side='left')
+        last = np.searchsorted(days, pd.Timestamp(end).normalize().to_datetime64(), side='left')
+        return int(cumulative[last] - cumulative[first])
+    
+    def load_title_index(self):
+        """Load the inverted title index built by data_export, if it matches the data."""
+        self._ensure_loaded()
+        
+        if self.title_index is None and os.path.exists(self.index_file):
+            with open(self.index_file, 'r') as f:
+                index = json.load(f)
+            # A stale index would point at the wrong rows, so ignore it
+            source = (os.path.getmtime(self.data_file), os.path.getsize(self.data_file))
+            if (index.get('source_mtime'), index.get('source_size')) == source and index.get('row_count') == len(self.df):
+                self.title_index = index
+                self.vocabulary = sorted(index['postings'])
+                self.watch_counts = np.asarray(index['watch_counts'])
+        return self.title_index
+    
+    def _postings(self, token):
+        """Return the posting list for an exact token as a cached sorted array."""
+        if token not in self.posting_arrays:
+            self.posting_arrays[token] = np.asarray(self.title_index['postings'].get(token, []), dtype=np.int64)
+        return self.posting_arrays[token]
+    
+    def _match_token(self, token):
+        """Return the sorted row IDs for a token, or for every token it prefixes if it ends in '*'."""
+        if not token.endswith('*'):
+            return self._postings(token)
         
-        return self.df[self.df['title'].str.contains(keyword, case=False, na=False)]
+        prefix = token[:-1]
+        matches = []
+        position = bisect_left(self.vocabulary, prefix)
+        while position < len(self.vocabulary) and self.vocabulary[position].startswith(prefix):
+            matches.append(self._postings(self.vocabulary[position]))
+            position += 1
+        return np.unique(np.concatenate(matches)) if matches else np.array([], dtype=np.int64)
+    
+    def match_rows(self, keyword, mode='and'):
+        """Return the row positions matching a title query, most watched titles first.
+        
+        Words ending in '*' match as prefixes. With mode='and' every word must
+        match, with mode='or' any word may match; other modes raise
+        ValueError. Falls back to a plain substring scan when no index matching
+        the data file has been exported.
+        """
+        if mode not in ('and', 'or'):
+            raise ValueError(f"mode must be 'and' or 'or', not {mode!r}")
+        if self.load_title_index() is None:
+            return np.flatnonzero(self.df['title'].str.contains(keyword, case=False, na=False, regex=False).to_numpy())
+        
+        tokens = re.findall(r'\\w+\\*?', keyword.lower())
+        if not tokens:
+            return np.array([], dtype=np.int64)
+        
+        rows = self._match_token(tokens[0])
+        for token in tokens[1:]:
+            if mode == 'or':
+                rows = np.union1d(rows, self._match_token(token))
+            else:
+                rows = np.intersect1d(rows, self._match_token(token), assume_unique=True)
+        
+        # Most watched titles first, original order within ties
+        return rows[np.lexsort((rows, -self.watch_counts[rows]))]
+    
+    def search_titles(self, keyword, mode='and', limit=None):
+        """Search for videos whose titles contain the query words, most watched first."""
+        rows = self.match_rows(keyword, mode)
+        return self.df.iloc[rows[:limit]]
+
+# Process-wide analyzers, keyed on (data file, modification time)
+_analyzer_cache = {}
+
+def get_analyzer(data_file=None):
+    """Return a shared analyzer for the data file, replacing it when the file changes."""
+    analyzer = YouTubeAnalyzer(data_file)
+    path = os.path.abspath(analyzer.data_file)
+    key = (path, analyzer.data_mtime())
+    if key not in _analyzer_cache:
+        for stale_key in [k for k in _analyzer_cache if k[0] == path]:
+            del _analyzer_cache[stale_key]
+        _analyzer_cache[key] = analyzer
+    return _analyzer_cache[key]
 
 def quick_stats(data_file=None):
     """Quick function to get basic statistics."""
-    analyzer = YouTubeAnalyzer(data_file)
-    return analyzer.get_viewing_stats()
+    return get_analyzer(data_file).get_viewing_stats()
 
-def search_videos(keyword, data_file=None):
+def search_videos(keyword, data_file=None, mode='and', limit=None):
     """Quick function to search for videos."""
-    analyzer = YouTubeAnalyzer(data_file)
-    return analyzer.search_titles(keyword)
+    return get_analyzer(data_file).search_titles(keyword, mode, limit)
 
 # Example usage:
-# from youtube_analysis import YouTubeAnalyzer, quick_stats
-# analyzer = YouTubeAnalyzer()
+# from youtube_analysis import YouTubeAnalyzer, get_analyzer, quick_stats
+# analyzer = get_analyzer()
 # stats = analyzer.get_viewing_stats()
 # recent = analyzer.get_recent_activity(days=7)
+# drag = analyzer.search_titles('rupaul drag*')
 '''
     
     with open(os.path.join(output_dir, 'youtube_analysis.py'), 'w') as f:
@@ -194,7 +394,8 @@ if __name__ == "__main__":
     main()
 '''
     
-    pipeline_script = os.path.join(os.path.dirname(input_file), '..', 'scripts', 'run_analysis_pipeline.py')
+    # normpath resolves '..' against the path rather than the target of a symlinked output/
+    pipeline_script = os.path.normpath(os.path.join(os.path.dirname(input_file), '..', 'scripts', 'run_analysis_pipeline.py'))
     with open(pipeline_script, 'w') as f:
         f.write(automation_content)
     
@@ -210,9 +411,11 @@ matplotlib>=3.5.0
 seaborn>=0.11.0
 wordcloud>=1.8.0
 pyarrow>=10.0.0  # Optional: for Parquet export
+scikit-learn>=1.1.0  # Optional: for topic clustering
+duckdb>=0.9.0  # Optional: columnar engine for SQL analytics
 '''
     
-    with open(os.path.join(os.path.dirname(input_file), '..', 'requirements.txt'), 'w') as f:
+    with open(os.path.normpath(os.path.join(os.path.dirname(input_file), '..', 'requirements.txt')), 'w') as f:
         f.write(requirements)
 
 def main():
@@ -220,10 +423,21 @@ def main():
     print("Starting data export and integration...")
     
     # Load data
-    df = load_data()
+    with track('load') as metrics:
+        df = load_data()
+        metrics['rows'] = len(df)
+        metrics['bytes_read'] = os.path.getsize(input_file)
     
     # Export to multiple formats
-    export_to_multiple_formats(df)
+    with track('save', output_dir=exports_dir) as metrics:
+        export_to_multiple_formats(df)
+        metrics['rows'] = len(df)
+    
+    # Build the title search index used by the Python module
+    with track('index') as metrics:
+        export_title_index(df, input_file)
+        metrics['rows'] = len(df)
+        metrics['bytes_written'] = os.path.getsize(index_file)
     
     # Create Python module for future use
     create_python_module()
@@ -236,6 +450,7 @@ def main():
     
     print(f"Data export completed successfully!")
     print(f"Exports saved to: {exports_dir}")
+    print(f"Title index: {index_file}")
     print(f"Python module created: {os.path.join(output_dir, 'youtube_analysis.py')}")
     print(f"Automation pipeline: ~/Developer/youtube-analysis/scripts/run_analysis_pipeline.py")
     print(f"Requirements file: ~/Developer/youtube-analysis/requirements.txt")
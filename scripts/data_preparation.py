@@ -1,43 +1,135 @@
 import os
 import json
+import time
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from collections import Counter
+
+from instrumentation import track, emit, current_stage
+from takeout_schema import read_export, validate_records, extract_metadata
 
 # Directory and output setup
 input_dir = os.path.expanduser('~/Developer/youtube-analysis/data/UserData_YouTube')
 output_file = os.path.expanduser('~/Developer/youtube-analysis/output/cleaned_watch_history.csv')
+quarantine_dir = os.path.expanduser('~/Developer/youtube-analysis/output/quarantine')
 
 # Function to clean video titles
 def clean_title(title):
     return (title.replace('\u0026#39;', "'")
                 .replace('\u0026amp;', '&'))
 
-# Load and process JSON files
-def load_and_process_files(directory):
-    all_data = []
-    for filename in os.listdir(directory):
+# Vectorized clean_title for a column of titles
+def clean_titles(titles):
+    return (titles.str.replace('\u0026#39;', "'", regex=False)
+                  .str.replace('\u0026amp;', '&', regex=False))
+
+# Drop repeated entries: the same video at the same time, or the same title for entries without a video ID
+def deduplicate(df):
+    video_codes, videos = pd.factorize(df['video_id'])
+    without_video = video_codes < 0
+    keys = video_codes.astype(np.int64)
+    keys[without_video] = len(videos) + pd.factorize(df['title'][without_video])[0]
+    # Hash index over (video or title code, timestamp)
+    duplicate = pd.DataFrame({'key': keys, 'timestamp': df['timestamp'].to_numpy()}).duplicated().to_numpy()
+    return df[~duplicate]
+
+# Load and process JSON files (all of them, or only the given names), quarantining entries that fail validation
+def load_and_process_files(directory, filenames=None):
+    frames = []
+    rejected = []
+    counters = Counter()
+    validation_seconds = 0.0
+    for filename in sorted(os.listdir(directory) if filenames is None else filenames):
         if filename.endswith('.json'):
+            counters['files'] += 1
             try:
-                with open(os.path.join(directory, filename), 'r') as file:
-                    data = json.load(file)
-                    # Data cleaning and parsing
-                    for entry in data:
-                        if 'title' in entry and 'date_watched' in entry:
-                            entry['title'] = clean_title(entry['title'])
-                            # Parse date_watched field instead of time
-                            entry['timestamp'] = datetime.strptime(entry['date_watched'], '%Y-%m-%d %H:%M:%S')
-                            all_data.append(entry)
-            except (json.JSONDecodeError, KeyError, ValueError) as e:
+                records, fragments = read_export(os.path.join(directory, filename))
+            except (OSError, UnicodeDecodeError) as e:
                 print(f"Error processing {filename}: {e}")
-    df = pd.DataFrame(all_data)
-    df.drop_duplicates(subset=['title', 'timestamp'], inplace=True)
+                counters['unreadable files'] += 1
+                continue
+            if fragments:
+                print(f"Warning: {filename} is not valid JSON; salvaged {len(records)} entries")
+                counters['malformed JSON fragments'] += len(fragments)
+                rejected.extend({'source': filename, 'reasons': ['malformed JSON'], 'fragment': fragment}
+                                for fragment in fragments)
+
+            started = time.perf_counter()
+            valid, file_rejected, file_counters = validate_records(records, filename)
+            validation_seconds += time.perf_counter() - started
+            frames.append(valid)
+            rejected.extend(file_rejected)
+            counters.update(file_counters)
+
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['title', 'timestamp'])
+    df['title'] = clean_titles(df['title'])
+    df = df.join(extract_metadata(df))
+    # Nested lists do not fit the flat CSV; their channel is kept in channel_id/channel_name
+    df.drop(columns=['subtitles'], errors='ignore', inplace=True)
+    df = deduplicate(df)
+    # Time order lets later stages stream the data in chunks and stitch sessions across them
+    df.sort_values('timestamp', kind='stable', inplace=True)
+    counters['duplicates'] = counters['valid'] - len(df)
+    counters['validation_seconds'] = round(validation_seconds, 4)
+    return df, rejected, counters
+
+# Read back previously cleaned data; only empty fields are missing, so titles like "None" survive
+def load_cleaned():
+    df = pd.read_csv(output_file, keep_default_na=False, na_values=[''])
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    for column in ['video_id', 'channel_id', 'channel_name']:
+        if column not in df:
+            df[column] = np.nan
+    return df
+
+# Merge newly ingested rows into the cleaned data, dropping entries that were already there
+def merge_cleaned(existing, new, counters):
+    df = pd.concat([existing, new], ignore_index=True)
+    df = deduplicate(df)
+    df.sort_values('timestamp', kind='stable', inplace=True)
+    counters['duplicates'] += len(existing) + len(new) - len(df)
     return df
 
-# Main script execution
-def main():
-    df = load_and_process_files(input_dir)
+# Write rejected entries with their reasons and the validation counters
+def save_quarantine(rejected, counters, append=False):
+    os.makedirs(quarantine_dir, exist_ok=True)
+    report_file = os.path.join(quarantine_dir, 'validation_report.json')
+    if append and os.path.exists(report_file):
+        # Counters cover every file ingested so far
+        with open(report_file, 'r') as f:
+            previous = Counter(json.load(f))
+        previous.update(counters)
+        counters = previous
+        counters['validation_seconds'] = round(counters['validation_seconds'], 4)
+    with open(os.path.join(quarantine_dir, 'rejected_entries.jsonl'), 'a' if append else 'w') as f:
+        for entry in rejected:
+            f.write(json.dumps(entry, default=str) + '\n')
+    with open(report_file, 'w') as f:
+        json.dump(dict(counters), f, indent=2)
+    emit(dict(counters, stage=current_stage(), step='validation'))
+
+# Main script execution; with append=True only the given files are read and merged into the existing cleaned data
+def main(filenames=None, append=False):
+    append = append and os.path.exists(output_file)
+    with track('load') as metrics:
+        df, rejected, counters = load_and_process_files(input_dir, filenames)
+        if append:
+            df = merge_cleaned(load_cleaned(), df, counters)
+        metrics['rows'] = len(df)
+    with track('quarantine', output_dir=quarantine_dir) as metrics:
+        save_quarantine(rejected, counters, append)
+        metrics['rows'] = len(rejected)
     # Save to CSV
-    df.to_csv(output_file, index=False)
+    with track('save') as metrics:
+        df.to_csv(output_file, index=False)
+        metrics['rows'] = len(df)
+        metrics['bytes_written'] = os.path.getsize(output_file)
+    print(f"Validated {counters['records']} entries from {counters['files']} file(s): "
+          f"{counters['valid']} valid, {counters['rejected']} quarantined")
+    if counters['rejected'] or counters['malformed JSON fragments']:
+        print(f"Rejected entries and reasons saved to {quarantine_dir}")
+    if append:
+        print(f"Merged into the existing cleaned data ({len(df)} entries in total)")
     print(f"Cleaned data saved to {output_file}")
 
 if __name__ == "__main__":
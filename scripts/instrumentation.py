@@ -0,0 +1,138 @@
+"""
+Pipeline Instrumentation
+
+Records wall time, CPU time, peak RSS, rows processed and bytes read/written
+for pipeline stages and their sub-steps (load, groupby, render, save, ...).
+
+Metrics are appended as JSON lines to the file named by the
+YTA_METRICS_FILE environment variable, which run_analysis_pipeline.py sets
+for every stage. When it is unset, tracking costs almost nothing and
+nothing is written, so scripts still run standalone.
+"""
+
+import os
+import sys
+import json
+import time
+import resource
+from contextlib import contextmanager
+from datetime import datetime
+
+# Environment variables shared with the pipeline runner
+METRICS_FILE_VAR = 'YTA_METRICS_FILE'
+RUN_ID_VAR = 'YTA_RUN_ID'
+STAGE_VAR = 'YTA_STAGE'
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    """Peak resident set size in megabytes."""
+    return rusage_peak_mb(resource.getrusage(who))
+
+def rusage_peak_mb(usage):
+    """Convert ru_maxrss to megabytes (Linux reports kilobytes, macOS bytes)."""
+    return usage.ru_maxrss / (1024 * 1024) if sys.platform == 'darwin' else usage.ru_maxrss / 1024
+
+def io_counters():
+    """Bytes read and written by this process so far, where the OS exposes them."""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            counters = dict(line.split(': ') for line in f.read().splitlines())
+        return int(counters['rchar']), int(counters['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+def snapshot_files(directory):
+    """Map every file under directory to its (mtime, size)."""
+    files = {}
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files[path] = (stat.st_mtime, stat.st_size)
+    return files
+
+def written_bytes(before, after):
+    """Total size of files that are new or changed between two snapshots."""
+    return sum(size for path, (mtime, size) in after.items() if before.get(path) != (mtime, size))
+
+def current_stage():
+    """Name of the stage being run, from the runner or the script name."""
+    return os.environ.get(STAGE_VAR) or os.path.splitext(os.path.basename(sys.argv[0]))[0]
+
+def emit(record):
+    """Append a metrics record to the metrics file, if one is configured."""
+    metrics_file = os.environ.get(METRICS_FILE_VAR)
+    if not metrics_file:
+        return
+    record = dict(record, run_id=os.environ.get(RUN_ID_VAR))
+    with open(metrics_file, 'a') as f:
+        f.write(json.dumps(record, default=str) + '\n')
+
+@contextmanager
+def track(step, output_dir=None):
+    """Measure one sub-step of the current stage.
+
+    Yields a dict the caller can fill with 'rows', 'bytes_read' or
+    'bytes_written'. Bytes not set explicitly are taken from the OS I/O
+    counters, or, when output_dir is given, from the files written there.
+
+    Example:
+        with track('load') as metrics:
+            df = pd.read_csv(input_file)
+            metrics['rows'] = len(df)
+    """
+    metrics = {}
+    io_before = io_counters()
+    files_before = snapshot_files(output_dir) if output_dir else None
+    started_at = datetime.now()
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+
+    error = None
+    try:
+        yield metrics
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        # Failed steps are recorded too, with what they measured up to the error
+        record = {
+            'stage': current_stage(),
+            'step': step,
+            'started_at': started_at.isoformat(),
+            'wall_seconds': round(time.perf_counter() - wall_started, 4),
+            'cpu_seconds': round(time.process_time() - cpu_started, 4),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'rows': metrics.get('rows'),
+            'error': error
+        }
+
+        io_after = io_counters()
+        if files_before is not None and 'bytes_written' not in metrics:
+            metrics['bytes_written'] = written_bytes(files_before, snapshot_files(output_dir))
+        if io_before and io_after:
+            metrics.setdefault('bytes_read', io_after[0] - io_before[0])
+            metrics.setdefault('bytes_written', io_after[1] - io_before[1])
+        record['bytes_read'] = metrics.get('bytes_read')
+        record['bytes_written'] = metrics.get('bytes_written')
+
+        emit(record)
+
+def new_run_id(prefix=''):
+    """A run id unique across runs started in the same second or in parallel."""
+    return f"{prefix}{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{os.getpid()}"
+
+def metrics_offset(metrics_file):
+    """Current end of the metrics file, to read back only the records appended after it."""
+    return os.path.getsize(metrics_file) if os.path.exists(metrics_file) else 0
+
+def read_metrics(metrics_file, run_id=None, offset=0):
+    """Load metrics records, optionally only those from one run or after a byte offset."""
+    if not os.path.exists(metrics_file):
+        return []
+    with open(metrics_file, 'r') as f:
+        f.seek(offset)
+        records = [json.loads(line) for line in f if line.strip()]
+    return [r for r in records if run_id is None or r.get('run_id') == run_id]
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Query Service Load Test
+
+Builds a synthetic watch history, starts the query service on it and
+measures requests per second and latency percentiles across the endpoints.
+"""
+
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import data_export
+import query_service
+from synthetic_data import generate_watch_history
+
+# Query mix sent by each client, cycled in order
+QUERIES = [
+    '/stats',
+    '/search?q=drag&limit=10',
+    '/search?q=music+live&mode=or&limit=10',
+    '/search?q=pod*&limit=10',
+    '/top_channels?n=10',
+    '/top_channels?n=10&year=2022',
+    '/range?start=2022-01-01&end=2022-07-01',
+    '/heatmap'
+]
+
+def prepare_workspace(work_dir, rows):
+    """Write the synthetic dataset, title index and analyzer module into work_dir."""
+    data_path = os.path.join(work_dir, 'cleaned_watch_history.csv')
+    history = generate_watch_history(rows, seed=0)
+    df = pd.DataFrame({
+        'title': history['title'],
+        'date_watched': history['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S'),
+        'timestamp': history['timestamp']
+    })
+    df.to_csv(data_path, index=False)
+
+    data_export.output_dir = work_dir
+    data_export.exports_dir = os.path.join(work_dir, 'exports')
+    data_export.index_file = os.path.join(data_export.exports_dir, 'title_index.json')
+    data_export.export_title_index(pd.read_csv(data_path), data_path)
+    data_export.create_python_module()
+    return data_path, os.path.join(work_dir, 'youtube_analysis.py')
+
+def run_client(base_url, deadline, offset):
+    """Issue requests until the deadline and return their latencies in seconds."""
+    latencies = []
+    position = offset
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        with urllib.request.urlopen(base_url + QUERIES[position % len(QUERIES)]) as response:
+            response.read()
+        latencies.append(time.perf_counter() - started)
+        position += 1
+    return latencies
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description='Load test the YouTube analysis query service')
+    parser.add_argument('--rows', type=int, default=100000, help='Synthetic watch events')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run')
+    parser.add_argument('--output', help='Optional JSON file for the results')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        print(f"Generating {args.rows} synthetic watch events...")
+        data_path, module_path = prepare_workspace(work_dir, args.rows)
+
+        started = time.perf_counter()
+        server = query_service.create_server(data_path, module_path, port=0)
+        warm_up_seconds = time.perf_counter() - started
+        base_url = f"http://{server.server_address[0]}:{server.server_address[1]}"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        print(f"Service warm in {warm_up_seconds:.2f}s, running {args.clients} clients for {args.duration}s...")
+        deadline = time.perf_counter() + args.duration
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            offsets = random.Random(0).sample(range(len(QUERIES) * args.clients), args.clients)
+            batches = list(pool.map(lambda offset: run_client(base_url, deadline, offset), offsets))
+
+        server.shutdown()
+        server.server_close()
+
+    latencies = np.concatenate([np.asarray(batch) for batch in batches]) * 1000
+    results = {
+        'rows': args.rows,
+        'clients': args.clients,
+        'duration_seconds': args.duration,
+        'warm_up_seconds': round(warm_up_seconds, 3),
+        'requests': int(len(latencies)),
+        'requests_per_second': round(len(latencies) / args.duration, 1),
+        'latency_ms': {
+            'p50': round(float(np.percentile(latencies, 50)), 3),
+            'p95': round(float(np.percentile(latencies, 95)), 3),
+            'p99': round(float(np.percentile(latencies, 99)), 3)
+        }
+    }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Load test results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Out-of-Core Processing
+
+Helpers for analysing watch histories larger than memory. The cleaned
+dataset (CSV or Parquet, one file or several) is streamed in fixed-size
+chunks; each stage reduces every chunk to small mergeable partial results
+(count tables, session boundaries) and combines them, so memory stays
+bounded by the chunk size and the size of the aggregates rather than the
+number of rows.
+"""
+
+import pandas as pd
+
+def iter_chunks(paths, chunk_size, columns=None):
+    """Yield the dataset in chunks of at most chunk_size rows with parsed timestamps.
+
+    Args:
+        paths: A cleaned CSV or Parquet file, or a list of them read in order
+        chunk_size: Maximum rows per chunk
+        columns: Optional subset of columns to read
+
+    Yields:
+        DataFrame: One chunk, with 'timestamp' as datetime64
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+
+    for path in paths:
+        if path.endswith('.parquet'):
+            import pyarrow.parquet as pq
+            batches = (batch.to_pandas() for batch in
+                       pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns))
+        else:
+            batches = pd.read_csv(path, chunksize=chunk_size, usecols=columns)
+
+        for chunk in batches:
+            chunk['timestamp'] = pd.to_datetime(chunk['timestamp'])
+            yield chunk
+
+def available_columns(path, columns):
+    """The columns of a CSV or Parquet file that are present, in the order given."""
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        present = set(pq.ParquetFile(path).schema_arrow.names)
+    else:
+        present = set(pd.read_csv(path, nrows=0).columns)
+    return [column for column in columns if column in present]
+
+def require_rows(rows):
+    """Fail with a clear message when streaming produced no rows to summarize."""
+    if not rows:
+        raise ValueError("No rows to analyze: the cleaned watch history is empty. "
+                         "Check the exports and the quarantine report from data_preparation.py")
+
+def merge_counts(total, partial):
+    """Add two count Series (None means nothing counted yet), keeping integer counts."""
+    if total is None:
+        return partial
+    return total.add(partial, fill_value=0).astype('int64')
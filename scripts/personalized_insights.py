@@ -1,9 +1,24 @@
 import pandas as pd
+import numpy as np
+import re
+import json
 import os
+import warnings
+
+from instrumentation import track
+from content_analysis import extract_channel_names
 
 # Input and output paths
 input_file = os.path.expanduser('~/Developer/youtube-analysis/output/cleaned_watch_history.csv')
 output_dir = os.path.expanduser('~/Developer/youtube-analysis/output/personalized_insights')
+profiles_file = os.path.expanduser('~/Developer/youtube-analysis/config/interest_profiles.json')
+
+# Profiles used when no config file exists; keywords match anywhere in the title, ignoring case
+DEFAULT_PROFILES = {
+    'Norwegian Pop': {'include': ['norwegian', 'pop']},
+    'Drag Content': {'include': ['drag', 'rupaul', 'queen', 'lgbt']},
+    'Podcasts': {'include': ['podcast', 'interview', 'episode']},
+}
 
 # Load the cleaned watch history data
 def load_data():
@@ -11,40 +26,168 @@ def load_data():
     df['timestamp'] = pd.to_datetime(df['timestamp'])
     return df
 
-# Analyze patterns specific to interests
-def analyze_interests(df):
-    interests_patterns = {
-        'Norwegian Pop': ['norwegian', 'pop'],
-        'Drag Content': ['drag', 'rupaul', 'queen', 'lgbt'],
-        'Podcasts': ['podcast', 'interview', 'episode'],
-    }
+# Load interest profiles: {name: {include, exclude, regex, channels}}, all lists optional
+def load_profiles():
+    if not os.path.exists(profiles_file):
+        print(f"⚠️  No interest profiles at {profiles_file}; using the built-in defaults")
+        return DEFAULT_PROFILES
+    with open(profiles_file, 'r') as f:
+        profiles = json.load(f)
+    for name, profile in profiles.items():
+        unknown = set(profile) - {'include', 'exclude', 'regex', 'channels'}
+        if unknown:
+            raise ValueError(f"Unknown keys in interest profile '{name}': {', '.join(sorted(unknown))}")
+        for pattern in profile.get('regex', []):
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"Invalid regex {pattern!r} in interest profile '{name}': {e}") from None
+    return profiles
+
+# Alternation of the keywords nested as a character trie, so each position is tried
+# against one branch per character instead of every keyword in turn
+def trie_pattern(keywords):
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def render(node):
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # A keyword ends here; the greedy optional still prefers the longer ones
+        if '' in node:
+            return (body if len(branches) > 1 else '(?:' + body + ')') + '?'
+        return body
+
+    return render(trie)
+
+# Which keywords occur in each title, from one scan with a single alternation. At each
+# position the longest keyword starting there is found; the shorter ones starting there
+# are its prefixes, so every keyword contained in a found one is counted as well.
+def keyword_hits(titles, keywords):
+    alternation = trie_pattern(keywords)
+    titles = titles.reset_index(drop=True)
+    # A plain search skips titles without any keyword far faster than the lookahead scan
+    candidates = titles[titles.str.contains(re.compile(alternation, re.IGNORECASE), na=False)]
+    found = candidates.str.findall(re.compile(f'(?=({alternation}))', re.IGNORECASE)).explode().dropna().str.lower()
+    position = {k: i for i, k in enumerate(keywords)}
+    matches = pd.DataFrame({'row': found.index, 'found': found.map(position)}).dropna().drop_duplicates()
+    contained = pd.DataFrame([(i, j) for i, outer in enumerate(keywords)
+                              for j, inner in enumerate(keywords) if inner in outer],
+                             columns=['found', 'keyword'])
+    pairs = matches.astype(np.int64).merge(contained, on='found')
+    matrix = np.zeros((len(titles), len(keywords)), dtype=bool)
+    matrix[pairs['row'].to_numpy(), pairs['keyword'].to_numpy()] = True
+    return {('keyword', k): matrix[:, i] for i, k in enumerate(keywords)}
+
+# Which regexes match each title, from one scan: the pattern matches wherever any regex
+# starts and captures every regex matching there in its own group (optional lookaheads)
+def regex_hits(titles, regexes):
+    starts = '|'.join(f'(?:{r})' for r in regexes)
+    captures = ''.join(f'(?:(?=(?P<t{i}>{r})))?' for i, r in enumerate(regexes))
+    pattern = re.compile(f'(?=(?:{starts})){captures}', re.IGNORECASE)
+    titles = titles.reset_index(drop=True)
+    candidates = titles[titles.str.contains(re.compile(starts, re.IGNORECASE), na=False)]
+    found = candidates.str.extractall(pattern).notna().groupby(level=0).any()
+    found = found.reindex(range(len(titles)), fill_value=False).astype(bool)
+    return {('regex', r): found[f't{i}'].to_numpy() for i, r in enumerate(regexes)}
 
-    interests_results = {key: 0 for key in interests_patterns.keys()}
+# Evaluate every distinct keyword, regex and channel over the distinct titles
+def evaluate_terms(entries, profiles):
+    titles = entries['title']
+    keywords = sorted({k.lower() for p in profiles.values() for k in p.get('include', []) + p.get('exclude', [])})
+    regexes = sorted({r for p in profiles.values() for r in p.get('regex', [])})
+    channels = {c.lower() for p in profiles.values() for c in p.get('channels', [])}
+    # Regexes with their own groups would clash with the combined pattern's groups
+    grouped = [r for r in regexes if re.compile(r).groups]
 
-    for title in df['title']:
-        title_lower = title.lower()
-        for interest, keywords in interests_patterns.items():
-            if any(keyword in title_lower for keyword in keywords):
-                interests_results[interest] += 1
+    hits = keyword_hits(titles, keywords) if keywords else {}
+    if len(regexes) > len(grouped):
+        hits.update(regex_hits(titles, [r for r in regexes if r not in grouped]))
+    with warnings.catch_warnings():
+        # Groups in a profile's regex are fine; only whether it matches is used
+        warnings.filterwarnings('ignore', 'This pattern is interpreted as a regular expression')
+        hits.update({('regex', r): titles.str.contains(r, case=False, regex=True).to_numpy() for r in grouped})
+    if channels:
+        title_channels = extract_channel_names(entries.copy())['extracted_channel'].str.lower()
+        hits.update({('channel', c): (title_channels == c).to_numpy() for c in channels})
+    return hits
 
-    return interests_results
+# Combine term matches into one column per profile: any include/regex/channel match and no exclude match
+def match_profiles(entries, profiles):
+    hits = evaluate_terms(entries, profiles)
+    no_match = np.zeros(len(entries), dtype=bool)
+
+    def any_of(kind, terms):
+        columns = [hits[(kind, term.lower() if kind != 'regex' else term)] for term in terms]
+        return np.logical_or.reduce(columns) if columns else no_match
+
+    matches = {}
+    for name, profile in profiles.items():
+        included = (any_of('keyword', profile.get('include', []))
+                    | any_of('regex', profile.get('regex', []))
+                    | any_of('channel', profile.get('channels', [])))
+        matches[name] = included & ~any_of('keyword', profile.get('exclude', []))
+    return pd.DataFrame(matches)
+
+# Flag which profiles every watch matches, evaluating each distinct title (and its channel) once
+def profile_matches(df, profiles):
+    codes, titles = pd.factorize(df['title'].astype(str))
+    entries = pd.DataFrame({'title': titles})
+    if 'channel_name' in df:
+        # Channel of the first watch of each title
+        first_watch = pd.Series(np.arange(len(df))).groupby(codes).first().to_numpy()
+        entries['channel_name'] = df['channel_name'].to_numpy()[first_watch]
+    matches = match_profiles(entries, profiles)
+    return pd.DataFrame(matches.to_numpy()[codes], columns=matches.columns, index=df.index)
+
+# Count watches per profile per month and per year in one groupby each
+def count_interests_over_time(df, matches):
+    months = df['timestamp'].dt.to_period('M').rename('month')
+    by_month = matches.groupby(months).sum()
+    by_year = by_month.groupby(by_month.index.year.rename('year')).sum()
+    return by_month, by_year
+
+# Total watches per profile
+def interest_totals(matches):
+    return {interest: int(count) for interest, count in matches.sum().items()}
+
+# Analyze patterns specific to interests
+def analyze_interests(df, profiles=None):
+    return interest_totals(profile_matches(df, profiles or load_profiles()))
 
 # Generate personalized insights
 def generate_insights(df):
-    interests_results = analyze_interests(df)
+    profiles = load_profiles()
+    matches = profile_matches(df, profiles)
+    interests_results = interest_totals(matches)
+    by_month, by_year = count_interests_over_time(df, matches)
 
     with open(os.path.join(output_dir, 'personalized_insights.txt'), 'w') as file:
         file.write("Personalized Insights based on Stated Interests:\n")
         for interest, count in interests_results.items():
             file.write(f"{interest}: {count} videos watched\n")
 
-    print(f"Personalized insights generated. Results saved to {output_dir}")
+    by_month.to_csv(os.path.join(output_dir, 'interests_by_month.csv'))
+    by_year.to_csv(os.path.join(output_dir, 'interests_by_year.csv'))
+
+    print(f"Personalized insights generated for {len(profiles)} interest profile(s). Results saved to {output_dir}")
 
 # Main execution
 def main():
-    df = load_data()
+    with track('load') as metrics:
+        df = load_data()
+        metrics['rows'] = len(df)
+        metrics['bytes_read'] = os.path.getsize(input_file)
     os.makedirs(output_dir, exist_ok=True)
-    generate_insights(df)
+    with track('insights', output_dir=output_dir) as metrics:
+        generate_insights(df)
+        metrics['rows'] = len(df)
 
 if __name__ == "__main__":
     main()
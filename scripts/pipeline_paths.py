@@ -0,0 +1,173 @@
+"""
+Pipeline Paths
+
+Each analysis stage defines its input and output paths as module-level
+globals pointing at ~/Developer/youtube-analysis. This module maps those
+globals onto any project directory with the same layout, so stages can be
+imported and run against other data (benchmarks, batch runs).
+"""
+
+import os
+import shutil
+import importlib
+
+default_project_dir = os.path.expanduser('~/Developer/youtube-analysis')
+# The repository checkout, whose config/ holds the example profiles
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Pipeline stages in execution order
+PIPELINE_STAGES = [
+    'data_preparation',
+    'temporal_analysis',
+    'content_analysis',
+    'behavioral_analysis',
+    'rewatch_analysis',
+    'trend_analysis',
+    'topic_clustering',
+    'personalized_insights',
+    'report_generation',
+    'dashboard',
+    'data_export',
+    'sql_analytics'
+]
+
+CLEANED_FILE = 'output/cleaned_watch_history.csv'
+PROFILES_FILE = 'config/interest_profiles.json'
+
+# Config files a new project directory starts from when it has none of its own
+CONFIG_FILES = [PROFILES_FILE]
+
+# Module-level path globals of each stage, relative to the project directory
+STAGE_PATHS = {
+    'data_preparation': {
+        'input_dir': 'data/UserData_YouTube',
+        'output_file': CLEANED_FILE,
+        'quarantine_dir': 'output/quarantine'
+    },
+    'temporal_analysis': {
+        'input_file': CLEANED_FILE,
+        'output_dir': 'output/temporal_analysis'
+    },
+    'content_analysis': {
+        'input_file': CLEANED_FILE,
+        'output_dir': 'output/content_analysis'
+    },
+    'behavioral_analysis': {
+        'input_file': CLEANED_FILE,
+        'output_dir': 'output/behavioral_insights'
+    },
+    'rewatch_analysis': {
+        'input_file': CLEANED_FILE,
+        'output_dir': 'output/rewatch_analysis'
+    },
+    'trend_analysis': {
+        'input_file': CLEANED_FILE,
+        'output_dir': 'output/trend_analysis'
+    },
+    'topic_clustering': {
+        'input_file': CLEANED_FILE,
+        'output_dir': 'output/topic_clusters'
+    },
+    'personalized_insights': {
+        'input_file': CLEANED_FILE,
+        'output_dir': 'output/personalized_insights',
+        'profiles_file': PROFILES_FILE
+    },
+    'report_generation': {
+        'base_dir': 'output',
+        'reports_dir': 'output/reports',
+        'visualizations_dir': 'output/visualizations',
+        'obsidian_dir': 'output/obsidian'
+    },
+    'dashboard': {
+        'temporal_dir': 'output/temporal_analysis',
+        'content_dir': 'output/content_analysis',
+        'output_file': 'output/reports/dashboard.html'
+    },
+    'data_export': {
+        'input_file': CLEANED_FILE,
+        'output_dir': 'output',
+        'exports_dir': 'output/exports',
+        'index_file': 'output/exports/title_index.json'
+    },
+    'sql_analytics': {
+        'input_file': CLEANED_FILE,
+        'output_dir': 'output/sql'
+    }
+}
+
+# Files each stage reads, relative to the project directory. The watcher reruns a
+# stage only when one of these changed; stages without listed inputs summarize
+# the stages before them and rerun whenever any of those did.
+STAGE_INPUTS = {
+    'data_preparation': ['data/UserData_YouTube'],
+    'temporal_analysis': [CLEANED_FILE],
+    'content_analysis': [CLEANED_FILE],
+    'behavioral_analysis': [CLEANED_FILE],
+    'rewatch_analysis': [CLEANED_FILE],
+    'trend_analysis': [CLEANED_FILE],
+    'topic_clustering': [CLEANED_FILE],
+    'personalized_insights': [CLEANED_FILE, PROFILES_FILE],
+    'report_generation': [],
+    'dashboard': [],
+    'data_export': [CLEANED_FILE],
+    'sql_analytics': [CLEANED_FILE]
+}
+
+# Entries directly under output/ that each stage writes. The watcher copies
+# only these for the stages it reruns and shares the rest with the live tree.
+STAGE_OUTPUTS = {
+    'data_preparation': [CLEANED_FILE, 'output/quarantine'],
+    'temporal_analysis': ['output/temporal_analysis'],
+    'content_analysis': ['output/content_analysis'],
+    'behavioral_analysis': ['output/behavioral_insights'],
+    'rewatch_analysis': ['output/rewatch_analysis'],
+    'trend_analysis': ['output/trend_analysis'],
+    'topic_clustering': ['output/topic_clusters'],
+    'personalized_insights': ['output/personalized_insights'],
+    'report_generation': ['output/reports', 'output/obsidian'],
+    'dashboard': ['output/reports'],
+    'data_export': ['output/exports', 'output/youtube_analysis.py'],
+    'sql_analytics': ['output/sql']
+}
+
+def project_path(project_dir, relative_path):
+    """Join a '/'-separated relative path onto the project directory."""
+    return os.path.join(project_dir, *relative_path.split('/'))
+
+def stage_paths(stage, project_dir):
+    """Return the path globals of a stage rooted at project_dir."""
+    return {name: project_path(project_dir, path) for name, path in STAGE_PATHS[stage].items()}
+
+def configure_stage(module, project_dir):
+    """Point an imported stage module's path globals at project_dir."""
+    stage = module.__name__.rsplit('.', 1)[-1]
+    for name, path in stage_paths(stage, project_dir).items():
+        setattr(module, name, path)
+    return module
+
+def load_stage(stage, project_dir):
+    """Import a stage module and configure it for project_dir."""
+    return configure_stage(importlib.import_module(stage), project_dir)
+
+def shared_config_file(relative_path):
+    """The main project's copy of a config file, else the repository's, or None."""
+    for root in (default_project_dir, repo_dir):
+        path = project_path(root, relative_path)
+        if os.path.exists(path):
+            return path
+    return None
+
+def prepare_project_dir(project_dir):
+    """Create the directories and config files stages expect to exist before they run."""
+    os.makedirs(project_path(project_dir, 'data/UserData_YouTube'), exist_ok=True)
+    os.makedirs(project_path(project_dir, 'output'), exist_ok=True)
+    # data_export writes its automation script next to the output directory
+    os.makedirs(project_path(project_dir, 'scripts'), exist_ok=True)
+    # Batch accounts and benchmark datasets use the shared config unless they have their own
+    for relative_path in CONFIG_FILES:
+        target = project_path(project_dir, relative_path)
+        source = shared_config_file(relative_path)
+        if source and not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(source, target)
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+YouTube Analysis Query Service
+
+Long-running local HTTP service that keeps the watch history warm in memory
+through the generated YouTubeAnalyzer and answers JSON queries:
+
+    GET /stats                                  Basic viewing statistics
+    GET /search?q=drag+rupaul*&mode=and&limit=20  Indexed title search
+    GET /top_channels?n=10&year=2023             Most watched channels
+    GET /range?start=2023-01-01&end=2023-02-01   Videos watched in a date range
+    GET /heatmap                                 Day-of-week x hour cube
+"""
+
+import os
+import sys
+import re
+import json
+import time
+import argparse
+import importlib.util
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from content_analysis import extract_channel_names
+
+# Input paths and server settings
+output_dir = os.path.expanduser('~/Developer/youtube-analysis/output')
+module_file = os.path.join(output_dir, 'youtube_analysis.py')
+data_file = os.path.join(output_dir, 'cleaned_watch_history.csv')
+default_host = '127.0.0.1'
+default_port = 8765
+
+def load_analyzer_module(path):
+    """Import the youtube_analysis module generated by data_export."""
+    spec = importlib.util.spec_from_file_location('youtube_analysis', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class QueryService:
+    """Answers queries from a warm analyzer and pre-aggregated channel counts."""
+
+    def __init__(self, analyzer):
+        """Wrap an analyzer and warm every aggregate used by the endpoints."""
+        self.analyzer = analyzer
+        self.lock = threading.Lock()
+        self.channels_mtime = None
+        self.channel_counts = None
+        self.channel_counts_by_year = None
+        self.warm_up()
+
+    def warm_up(self):
+        """Load data, title index and aggregates so the first request is fast."""
+        with self.lock:
+            self.analyzer.get_viewing_stats()
+            self.analyzer.load_title_index()
+            self.analyzer.get_daily_counts()
+            self.analyzer.get_hourly_cube()
+            self._refresh_channels()
+
+    def _refresh_channels(self):
+        """Recompute channel counts whenever the analyzer reloaded its data."""
+        self.analyzer._ensure_loaded()
+        if self.channels_mtime == self.analyzer.loaded_mtime:
+            return
+        columns = [c for c in ['title', 'timestamp', 'channel_name'] if c in self.analyzer.df]
+        df = extract_channel_names(self.analyzer.df[columns].copy())
+        self.channel_counts = df['extracted_channel'].value_counts()
+        by_year = df.groupby([df['timestamp'].dt.year, 'extracted_channel']).size()
+        self.channel_counts_by_year = {
+            int(year): counts.droplevel(0).sort_values(ascending=False)
+            for year, counts in by_year.groupby(level=0)
+        }
+        self.channels_mtime = self.analyzer.loaded_mtime
+
+    def stats(self, params):
+        """Basic viewing statistics."""
+        with self.lock:
+            stats = self.analyzer.get_viewing_stats()
+        return {
+            'total_videos': stats['total_videos'],
+            'start': stats['date_range'][0].isoformat(),
+            'end': stats['date_range'][1].isoformat(),
+            'years_covered': [int(year) for year in stats['years_covered']],
+            'daily_average': stats['daily_average']
+        }
+
+    def search(self, params):
+        """Indexed title search, most watched titles first."""
+        query = params.get('q', '')
+        mode = params.get('mode', 'and')
+        limit = int(params.get('limit', 20))
+        with self.lock:
+            rows = self.analyzer.match_rows(query, mode)
+            top = self.analyzer.df.iloc[rows[:limit]]
+        return {
+            'query': query,
+            'total': len(rows),
+            'results': [
+                {'title': title, 'timestamp': timestamp.isoformat()}
+                for title, timestamp in zip(top['title'], top['timestamp'])
+            ]
+        }
+
+    def top_channels(self, params):
+        """Most watched channels overall or for one year."""
+        n = int(params.get('n', 10))
+        with self.lock:
+            self._refresh_channels()
+            if 'year' in params:
+                counts = self.channel_counts_by_year.get(int(params['year']))
+            else:
+                counts = self.channel_counts
+        if counts is None:
+            return {'channels': []}
+        top = counts.head(n)
+        return {'channels': [{'channel': channel, 'count': int(count)} for channel, count in top.items()]}
+
+    def time_range(self, params):
+        """Videos watched on days from start up to but excluding end."""
+        with self.lock:
+            count = self.analyzer.count_between(params['start'], params['end'])
+        return {'start': params['start'], 'end': params['end'], 'count': count}
+
+    def heatmap(self, params):
+        """Video counts by day of week and hour of day."""
+        with self.lock:
+            cube = self.analyzer.get_hourly_cube()
+        return {
+            'day_of_week': [int(day) for day in cube.index],
+            'hour': [int(hour) for hour in cube.columns],
+            'counts': cube.to_numpy().tolist()
+        }
+
+    def routes(self):
+        """Map URL paths to query handlers."""
+        return {
+            '/stats': self.stats,
+            '/search': self.search,
+            '/top_channels': self.top_channels,
+            '/range': self.time_range,
+            '/heatmap': self.heatmap
+        }
+
+def make_handler(service):
+    """Build a request handler class bound to a query service."""
+    routes = service.routes()
+
+    class QueryHandler(BaseHTTPRequestHandler):
+        """Dispatch GET requests to the query service as JSON."""
+
+        def do_GET(self):
+            started = time.perf_counter()
+            url = urlparse(self.path)
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            handler = routes.get(url.path)
+            if handler is None:
+                status, body = 404, {'error': f"Unknown endpoint {url.path}", 'endpoints': sorted(routes)}
+            else:
+                try:
+                    status, body = 200, handler(params)
+                except (KeyError, ValueError, re.error) as e:
+                    status, body = 400, {'error': f"Bad query: {e}"}
+                except Exception as e:
+                    # Keep the connection answered with JSON rather than dropping it
+                    status, body = 500, {'error': f"Query failed: {type(e).__name__}: {e}"}
+            body['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 3)
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            # Per-request logging would dominate latency under load
+            pass
+
+    return QueryHandler
+
+def create_server(data_path=None, module_path=None, host=default_host, port=default_port):
+    """Load the analyzer, warm it up and return a ready HTTP server."""
+    module = load_analyzer_module(module_path or module_file)
+    service = QueryService(module.get_analyzer(data_path or data_file))
+    return ThreadingHTTPServer((host, port), make_handler(service))
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description='Serve YouTube analysis queries over HTTP')
+    parser.add_argument('--data-file', default=data_file, help='Cleaned watch history CSV')
+    parser.add_argument('--module-file', default=module_file, help='Generated youtube_analysis.py')
+    parser.add_argument('--host', default=default_host)
+    parser.add_argument('--port', type=int, default=default_port)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.module_file):
+        print(f"Analyzer module not found at {args.module_file}. Run data_export.py first.")
+        sys.exit(1)
+
+    print("Loading watch history and warming aggregates...")
+    started = time.perf_counter()
+    server = create_server(args.data_file, args.module_file, args.host, args.port)
+    print(f"Ready in {time.perf_counter() - started:.2f}s")
+    print(f"Serving on http://{args.host}:{args.port}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Query service stopped")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
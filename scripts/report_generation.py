@@ -1,9 +1,8 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
 from datetime import datetime
 
+from instrumentation import track
+
 # Input and output paths
 base_dir = os.path.expanduser('~/Developer/youtube-analysis/output')
 reports_dir = os.path.join(base_dir, 'reports')
@@ -61,12 +60,18 @@ All visualizations are saved in high-resolution PNG format:
 - `content_categories.png` - Content category distribution
 - `video_titles_wordcloud.png` - Common words in video titles
 
+An interactive version that filters by year and drills into days, hours and categories
+is in `reports/dashboard.html`; it works offline in any browser.
+
 ## Data Files
 
 Detailed analysis results are available in CSV format:
 - Temporal analysis: `temporal_analysis/`
 - Content analysis: `content_analysis/`
 - Behavioral insights: `behavioral_insights/`
+- Rewatch analysis: `rewatch_analysis/`
+- Trend analysis: `trend_analysis/`
+- Topic clusters: `topic_clusters/`
 - Personalized insights: `personalized_insights/`
 
 ## Analysis Methodology
@@ -166,16 +171,39 @@ created: {datetime.now().strftime('%Y-%m-%d')}
 - `title`: Video title (string, HTML entities cleaned)
 - `timestamp`: Watch timestamp (datetime, ISO format)
 - `time`: Original timestamp string from JSON
+- `titleUrl`: Video URL from Takeout exports
+- `video_id`: YouTube video ID parsed from `titleUrl` (empty for `date_watched` exports and removed videos)
+- `channel_id`: Channel ID parsed from the Takeout `subtitles` channel URL
+- `channel_name`: Channel name from the Takeout `subtitles`
 - `year`: Extracted year from timestamp (integer)
 - `month`: Extracted month from timestamp (integer, 1-12)
 - `day_of_week`: Day of week (integer, 0=Monday, 6=Sunday)
 - `hour`: Hour of day (integer, 0-23)
 - `date`: Date component only (date)
 
+### quarantine/
+- `rejected_entries.jsonl`: Export entries that failed validation, one JSON object per line with `source` file, `index`, `reasons` and the original `entry` (or the undecodable `fragment` of a malformed file)
+- `validation_report.json`: Counts of entries read, valid, rejected and each rejection reason
+
+### watch/
+- `watch_log.jsonl`: One line per watch-mode update with the changed files, stages rerun, per-stage seconds and `latency_seconds` from file arrival to updated outputs
+- `watch_state.json`: Export files already ingested and the input hashes each stage last ran with
+
+### sql/
+- `watch_history.sqlite`: SQL database with the tables below; query it with `sql_analytics.py query` or `WatchHistoryDB`
+- `history`: One row per watch with `title_id`, `title`, `timestamp`, `date`, `week` (Monday of the week), `year`, `month`, `day_of_week`, `hour`, `video_id`, `channel_id`, `channel` (as in content analysis) and `session_id`
+- `sessions`: One row per viewing session with `started_at`, `ended_at`, `videos` and `minutes`
+- `categories`: One row per distinct title (`title_id`, joining `history.title_id`) and content category
+- `materialized_views`: Name, defining query and last refresh time of each materialized view
+- `query_benchmark_<engine>.json`: Timing of the stage aggregations as SQL and whether each matches the stage output
+
+### reports/dashboard.html
+- Self-contained interactive dashboard built from `temporal_analysis/year_day_hour_analysis.csv`, `content_analysis/category_evolution_by_year.csv` and `content_analysis/top_channels_*.csv`; the aggregates are embedded as JSON and filtered in the browser
+
 ## Derived Fields
 
 ### Content Analysis
-- `extracted_channel`: Channel name extracted from title (string)
+- `extracted_channel`: Channel name from the export where available, otherwise extracted from the title (string)
 - `categories`: Content categories assigned (list)
 
 ### Temporal Analysis
@@ -190,6 +218,8 @@ created: {datetime.now().strftime('%Y-%m-%d')}
 - `monthly_analysis.csv`: Videos watched per month
 - `day_of_week_analysis.csv`: Videos watched per day of week
 - `hourly_analysis.csv`: Videos watched per hour
+- `day_hour_analysis.csv`: Videos watched per hour within each day of week
+- `year_day_hour_analysis.csv`: Videos watched per hour within each day of week, per year
 - `peak_hour_result.txt`: Peak viewing hour
 - `peak_day_result.txt`: Peak viewing day
 
@@ -202,15 +232,39 @@ created: {datetime.now().strftime('%Y-%m-%d')}
 ### Behavioral Analysis Files
 - `behavioral_insights.txt`: Key behavioral metrics
 
+### Rewatch Analysis Files
+- `rewatch_counts.csv`: Every rewatched title with watch count, rewatches, separate returns, first/last watch and median interval
+- `rewatch_intervals.csv`: Rewatches per time-between-watches bin
+- `comfort_rewatches.csv`: Titles returned to on separate days over at least a month
+- `rewatch_summary.txt`: Rewatched titles and share of repeat watches
+
+### Trend Analysis Files
+- `daily_trends.csv`: Videos per calendar day with 7/30/90-day rolling averages
+- `category_shares_30d.csv`: Share of each category in the trailing 30 days of watches
+- `change_points.csv`: Dates where the average daily viewing shifted, with the averages before and after
+- `trend_state.json`: Daily counts carried between runs so only new watches are counted
+
+### Topic Clustering Files
+- `topic_assignments.csv`: Topic number of every distinct title
+- `topic_clusters.csv`: Titles, watches and most distinctive words per topic
+- `topic_model.npz`: Cluster centers and feature weights used to place new titles in existing topics
+
 ### Personalized Analysis Files
 - `personalized_insights.txt`: Interest-based analysis results
+- `interests_by_month.csv`: Videos matching each interest profile per month
+- `interests_by_year.csv`: Videos matching each interest profile per year
 
 ## Metrics Definitions
 
 - **Binge Session**: Multiple videos watched within 2-hour window
+- **Rewatch**: Any watch of a title after its first watch
+- **Change Point**: Day where the mean daily video count shifts, found by binary segmentation with a BIC-style penalty
+- **Topic**: Cluster of titles with similar hashed word and character n-grams (mini-batch k-means)
+- **Comfort Rewatch**: Title returned to at least twice, more than a day apart, over at least 30 days
 - **Peak Time**: Time period with highest viewing frequency
 - **Content Category**: Keyword-based classification of video content
-- **Channel Extraction**: Pattern-based extraction from video titles
+- **Channel Extraction**: Real channel from Takeout `subtitles`, falling back to pattern-based extraction from video titles
+- **Duplicate Entry**: Same video ID (or, without one, same title) at the same timestamp
 - **Viewing Frequency**: Videos per time unit (day/week/month)
 
 ## File Locations
@@ -236,9 +290,10 @@ def main():
     print("Generating comprehensive reports...")
     
     # Create all reports
-    create_master_report()
-    create_executive_summary()
-    create_data_dictionary()
+    with track('render', output_dir=reports_dir):
+        create_master_report()
+        create_executive_summary()
+        create_data_dictionary()
     
     print(f"Reports generated successfully!")
     print(f"Reports saved to: {reports_dir}")
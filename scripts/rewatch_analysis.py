@@ -0,0 +1,163 @@
+import pandas as pd
+import numpy as np
+import os
+
+from instrumentation import track
+from stage_options import plots_enabled
+
+# Input and output paths
+input_file = os.path.expanduser('~/Developer/youtube-analysis/output/cleaned_watch_history.csv')
+output_dir = os.path.expanduser('~/Developer/youtube-analysis/output/rewatch_analysis')
+
+# Bins for the time between two watches of the same title
+INTERVAL_BINS = [pd.Timedelta(0), pd.Timedelta(hours=1), pd.Timedelta(days=1), pd.Timedelta(days=7),
+                 pd.Timedelta(days=30), pd.Timedelta(days=365), pd.Timedelta.max]
+INTERVAL_LABELS = ['Under 1 hour', '1 hour - 1 day', '1 day - 1 week', '1 week - 1 month',
+                   '1 month - 1 year', 'Over 1 year']
+
+# A comfort rewatch is a title returned to on several separate days over a long stretch
+COMFORT_MIN_RETURNS = 2
+COMFORT_MIN_SPAN = pd.Timedelta(days=30)
+RETURN_GAP = pd.Timedelta(days=1)
+
+def load_data():
+    """Load the titles and timestamps of the cleaned watch history."""
+    df = pd.read_csv(input_file, usecols=['title', 'timestamp'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df
+
+def build_title_index(df):
+    """Hash every title to an integer code and group the watches of each title.
+
+    Returns a dict with the distinct titles, the code of every watch, and the
+    watch positions ordered by (code, timestamp). The watches of title i are
+    order[offsets[i]:offsets[i + 1]], oldest first.
+    """
+    codes, titles = pd.factorize(df['title'])
+    order = np.lexsort((df['timestamp'].values, codes))
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(titles)))))
+    return {'titles': titles, 'codes': codes, 'order': order, 'offsets': offsets}
+
+def watch_intervals(index, df):
+    """Time between consecutive watches of the same title.
+
+    Returns:
+        DataFrame: one row per rewatch with the title code and the interval
+    """
+    codes = index['codes'][index['order']]
+    timestamps = df['timestamp'].values[index['order']]
+    # Consecutive positions in (code, timestamp) order belong to the same title when their codes match
+    same_title = codes[1:] == codes[:-1]
+    return pd.DataFrame({
+        'code': codes[1:][same_title],
+        'interval': timestamps[1:][same_title] - timestamps[:-1][same_title]
+    })
+
+def count_rewatches(index, df, intervals):
+    """Watch count, rewatch count and first/last watch of every rewatched title."""
+    grouped = df['timestamp'].groupby(index['codes'])
+    stats = pd.DataFrame({
+        'watch_count': grouped.size(),
+        'first_watched': grouped.min(),
+        'last_watched': grouped.max()
+    })
+    stats['rewatches'] = stats['watch_count'] - 1
+    # Rewatches more than a day after the previous watch, i.e. separate returns to the title
+    stats['returns'] = (intervals['interval'] > RETURN_GAP).groupby(intervals['code']).sum()
+    stats['returns'] = stats['returns'].fillna(0).astype(int)
+    stats['median_interval_days'] = (intervals['interval'].dt.total_seconds() / 86400).groupby(intervals['code']).median()
+
+    rewatched = stats[stats['watch_count'] > 1].copy()
+    rewatched.insert(0, 'title', index['titles'][rewatched.index])
+    return rewatched.sort_values(['watch_count', 'title'], ascending=[False, True]).reset_index(drop=True)
+
+def interval_distribution(intervals):
+    """Count rewatches per interval bin."""
+    bins = pd.cut(intervals['interval'], bins=INTERVAL_BINS, labels=INTERVAL_LABELS, right=False)
+    return bins.value_counts(sort=False).rename_axis('interval').reset_index(name='rewatch_count')
+
+def find_comfort_rewatches(rewatches):
+    """Titles returned to repeatedly over at least a month."""
+    span = rewatches['last_watched'] - rewatches['first_watched']
+    comfort = rewatches[(rewatches['returns'] >= COMFORT_MIN_RETURNS) & (span >= COMFORT_MIN_SPAN)].copy()
+    comfort['span_days'] = span[comfort.index].dt.days
+    return comfort.sort_values(['returns', 'watch_count', 'title'], ascending=[False, False, True]).reset_index(drop=True)
+
+def analyze_rewatches(df):
+    """Run the rewatch analysis on the full watch history."""
+    # Untitled watches can't be matched to a title; factorize would code them -1
+    df = df.dropna(subset=['title']).reset_index(drop=True)
+    index = build_title_index(df)
+    intervals = watch_intervals(index, df)
+    rewatches = count_rewatches(index, df, intervals)
+
+    results = {
+        'rewatch_counts': rewatches,
+        'rewatch_intervals': interval_distribution(intervals),
+        'comfort_rewatches': find_comfort_rewatches(rewatches),
+        'summary': {
+            'total_watches': len(df),
+            'unique_titles': len(index['titles']),
+            'rewatched_titles': len(rewatches),
+            'rewatch_share': len(intervals) / max(len(df), 1),
+            'median_interval_days': intervals['interval'].median().total_seconds() / 86400 if len(intervals) else None
+        }
+    }
+    results['summary']['comfort_titles'] = len(results['comfort_rewatches'])
+    return results
+
+def create_visualizations(results):
+    """Create a chart of the time between rewatches."""
+    # Plotting libraries are only imported when charts are rendered
+    import matplotlib.pyplot as plt
+
+    distribution = results['rewatch_intervals']
+    plt.figure(figsize=(10, 6))
+    plt.bar(distribution['interval'].astype(str), distribution['rewatch_count'])
+    plt.title('Time Between Rewatches of the Same Video')
+    plt.xlabel('Interval')
+    plt.ylabel('Rewatch Count')
+    plt.xticks(rotation=30, ha='right')
+    plt.tight_layout()
+    plt.savefig(os.path.join(output_dir, 'rewatch_intervals.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+
+def save_results(results):
+    """Save rewatch analysis results to CSV files and a text summary."""
+    results['rewatch_counts'].to_csv(os.path.join(output_dir, 'rewatch_counts.csv'), index=False)
+    results['rewatch_intervals'].to_csv(os.path.join(output_dir, 'rewatch_intervals.csv'), index=False)
+    results['comfort_rewatches'].to_csv(os.path.join(output_dir, 'comfort_rewatches.csv'), index=False)
+    with open(os.path.join(output_dir, 'rewatch_summary.txt'), 'w') as f:
+        for key, value in results['summary'].items():
+            f.write(f"{key}: {value}\n")
+
+def main():
+    """Main execution function."""
+    os.makedirs(output_dir, exist_ok=True)
+
+    with track('load') as metrics:
+        df = load_data()
+        metrics['rows'] = len(df)
+        metrics['bytes_read'] = os.path.getsize(input_file)
+
+    with track('groupby') as metrics:
+        results = analyze_rewatches(df)
+        metrics['rows'] = len(df)
+
+    if plots_enabled():
+        with track('render', output_dir=output_dir):
+            create_visualizations(results)
+
+    with track('save', output_dir=output_dir):
+        save_results(results)
+
+    summary = results['summary']
+    print(f"Rewatch analysis completed. Results saved to {output_dir}")
+    print(f"Rewatched titles: {summary['rewatched_titles']} of {summary['unique_titles']} "
+          f"({summary['rewatch_share']:.1%} of watches were repeats)")
+    if len(results['comfort_rewatches']):
+        top = results['comfort_rewatches'].iloc[0]
+        print(f"Top comfort rewatch: {top['title']} ({top['watch_count']} watches over {top['span_days']} days)")
+
+if __name__ == "__main__":
+    main()
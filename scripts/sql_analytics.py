@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""
+SQL Analytics
+
+Loads the cleaned watch history into an embedded SQL database so ad-hoc
+questions are a query instead of a new pandas script that reloads the CSV:
+
+    history     One row per watch with precomputed date, week, year, month,
+                day_of_week and hour, the channel content analysis uses and
+                the viewing session the watch belongs to
+    sessions    One row per viewing session (watches less than
+                behavioral_analysis.SESSION_GAP apart)
+    categories  (title_id, category) pairs from content_analysis, one row
+                per distinct title and category; join on history.title_id
+
+SQLite from the standard library is the default engine; DuckDB, a columnar
+engine that is much faster on large group-bys, is used with --engine duckdb
+when it is installed. Neither has native materialized views, so they are
+stored as tables alongside their defining query and rebuilt by 'refresh'
+and after every load. The aggregations of the analysis stages are kept as
+SQL in STAGE_QUERIES; 'benchmark' times them and checks each against the
+stage's own output.
+
+    python sql_analytics.py build [--engine duckdb]
+    python sql_analytics.py query "SELECT channel, COUNT(*) FROM history GROUP BY channel"
+    python sql_analytics.py materialize late_night "SELECT * FROM history WHERE hour < 4"
+    python sql_analytics.py refresh
+    python sql_analytics.py benchmark --repeat 5
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import statistics
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import track
+from behavioral_analysis import SESSION_GAP
+from content_analysis import extract_channel_names, categorize_content
+
+# Input and output paths
+input_file = os.path.expanduser('~/Developer/youtube-analysis/output/cleaned_watch_history.csv')
+output_dir = os.path.expanduser('~/Developer/youtube-analysis/output/sql')
+
+ENGINES = {'sqlite': 'watch_history.sqlite', 'duckdb': 'watch_history.duckdb'}
+
+TABLES = {
+    'history': """
+        CREATE TABLE history (
+            id INTEGER PRIMARY KEY,
+            title_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            date TEXT NOT NULL,
+            week TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            day_of_week INTEGER NOT NULL,
+            hour INTEGER NOT NULL,
+            video_id TEXT,
+            channel_id TEXT,
+            channel TEXT,
+            session_id INTEGER NOT NULL
+        )""",
+    'sessions': """
+        CREATE TABLE sessions (
+            session_id INTEGER PRIMARY KEY,
+            started_at TEXT NOT NULL,
+            ended_at TEXT NOT NULL,
+            videos INTEGER NOT NULL,
+            minutes DOUBLE NOT NULL
+        )""",
+    'categories': """
+        CREATE TABLE categories (
+            title_id INTEGER NOT NULL,
+            category TEXT NOT NULL,
+            PRIMARY KEY (title_id, category)
+        )"""
+}
+
+# Indexes for the common filters and group-bys
+INDEXES = {
+    'history_timestamp': 'history (timestamp)',
+    'history_date': 'history (date)',
+    'history_year_day_hour': 'history (year, day_of_week, hour)',
+    'history_channel': 'history (channel, year)',
+    'history_title': 'history (title)',
+    # Covers counting watches per title, overall and per year
+    'history_title_id': 'history (title_id, year)',
+    'history_session': 'history (session_id)',
+    'categories_category': 'categories (category)'
+}
+
+# Created on every build unless a view of the same name already exists
+DEFAULT_VIEWS = {
+    'daily_counts': 'SELECT date, COUNT(*) AS videos FROM history GROUP BY date',
+    'channel_year_counts': 'SELECT year, channel, COUNT(*) AS videos FROM history GROUP BY year, channel'
+}
+
+VIEWS_TABLE = 'materialized_views'
+
+# Aggregations of the analysis stages as SQL, with the stage output each one reproduces
+STAGE_QUERIES = {
+    'yearly': ('temporal_analysis/yearly_analysis.csv', """
+        SELECT year, COUNT(*) AS video_count FROM history GROUP BY year ORDER BY year"""),
+    'monthly': ('temporal_analysis/monthly_analysis.csv', """
+        SELECT month, COUNT(*) AS video_count FROM history GROUP BY month ORDER BY month"""),
+    'day_of_week': ('temporal_analysis/day_of_week_analysis.csv', """
+        SELECT day_of_week, COUNT(*) AS video_count FROM history GROUP BY day_of_week ORDER BY day_of_week"""),
+    'hourly': ('temporal_analysis/hourly_analysis.csv', """
+        SELECT hour, COUNT(*) AS video_count FROM history GROUP BY hour ORDER BY hour"""),
+    'day_hour': ('temporal_analysis/day_hour_analysis.csv', """
+        SELECT day_of_week, hour, COUNT(*) AS video_count
+        FROM history GROUP BY day_of_week, hour ORDER BY day_of_week, hour"""),
+    'year_day_hour': ('temporal_analysis/year_day_hour_analysis.csv', """
+        SELECT year, day_of_week, hour, COUNT(*) AS video_count
+        FROM history GROUP BY year, day_of_week, hour ORDER BY year, day_of_week, hour"""),
+    'top_channels_overall': ('content_analysis/top_channels_overall.csv', """
+        SELECT channel AS extracted_channel, COUNT(*) AS count
+        FROM history GROUP BY channel ORDER BY count DESC, channel LIMIT 20"""),
+    'top_channels_by_year': (None, """
+        SELECT year, channel AS extracted_channel, count FROM (
+            SELECT year, channel, COUNT(*) AS count,
+                   ROW_NUMBER() OVER (PARTITION BY year ORDER BY COUNT(*) DESC, channel) AS position
+            FROM history GROUP BY year, channel
+        ) ranked WHERE position <= 10 ORDER BY year, position"""),
+    # Watches are counted per title before the join, so each title's categories are looked up once
+    'content_categories': ('content_analysis/content_categories.csv', """
+        SELECT c.category AS Category, SUM(t.videos) AS Count
+        FROM (SELECT title_id, COUNT(*) AS videos FROM history GROUP BY title_id) t
+        JOIN categories c ON c.title_id = t.title_id
+        GROUP BY c.category ORDER BY Count DESC"""),
+    'category_evolution_by_year': ('content_analysis/category_evolution_by_year.csv', """
+        SELECT t.year AS Year, c.category AS Category, SUM(t.videos) AS Count
+        FROM (SELECT title_id, year, COUNT(*) AS videos FROM history GROUP BY title_id, year) t
+        JOIN categories c ON c.title_id = t.title_id
+        GROUP BY t.year, c.category ORDER BY Year, Count DESC"""),
+    'behavioral_summary': ('behavioral_insights/behavioral_insights.txt', """
+        SELECT
+            (SELECT AVG(videos) FROM (SELECT COUNT(*) AS videos FROM history GROUP BY date) d) AS daily_avg,
+            (SELECT AVG(videos) FROM (SELECT COUNT(*) AS videos FROM history GROUP BY week) w) AS weekly_avg,
+            (SELECT AVG(videos) FROM (SELECT COUNT(*) AS videos FROM history GROUP BY year, month) m) AS monthly_avg,
+            (SELECT COUNT(*) FROM sessions) AS binge_sessions_count"""),
+    'rewatch_counts': ('rewatch_analysis/rewatch_counts.csv', """
+        SELECT title, COUNT(*) AS watch_count, MIN(timestamp) AS first_watched,
+               MAX(timestamp) AS last_watched, COUNT(*) - 1 AS rewatches
+        FROM history GROUP BY title HAVING COUNT(*) > 1 ORDER BY watch_count DESC, title""")
+}
+
+IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+def database_file(engine='sqlite'):
+    return os.path.join(output_dir, ENGINES[engine])
+
+def connect(path, engine):
+    """Open a connection with the given engine."""
+    if engine == 'duckdb':
+        try:
+            import duckdb
+        except ImportError:
+            raise ImportError("DuckDB is not installed; use the default sqlite engine or pip install duckdb")
+        return duckdb.connect(path)
+    return sqlite3.connect(path)
+
+def engine_errors():
+    """Exception classes raised by the database engines that are installed."""
+    errors = (sqlite3.Error,)
+    try:
+        import duckdb
+        errors += (duckdb.Error,)
+    except ImportError:
+        pass
+    return errors
+
+def build_tables(df):
+    """The history, sessions and categories tables as DataFrames."""
+    # Timestamps are stored as the cleaned file's 'YYYY-MM-DD HH:MM:SS' text, which sorts chronologically
+    text = df['timestamp'].astype(str)
+    timestamps = pd.to_datetime(text)
+    order = np.argsort(timestamps.to_numpy(), kind='stable')
+    ordered = timestamps.to_numpy()[order]
+    session_of_ordered = np.concatenate([[0], np.cumsum(np.diff(ordered) > np.timedelta64(SESSION_GAP))])
+    session_ids = np.empty(len(df), dtype=np.int64)
+    session_ids[order] = session_of_ordered
+
+    channels = extract_channel_names(df.copy())['extracted_channel']
+    # Monday of the week, as pandas' weekly periods (Monday to Sunday)
+    weeks = (timestamps.dt.normalize() - pd.to_timedelta(timestamps.dt.dayofweek, unit='D')).dt.strftime('%Y-%m-%d')
+    # Categories are joined on an integer title ID rather than the title text
+    title_ids, titles = pd.factorize(df['title'])
+    history = pd.DataFrame({
+        'id': np.arange(len(df)),
+        'title_id': title_ids,
+        'title': df['title'],
+        'timestamp': text,
+        'date': text.str.slice(0, 10),
+        'week': weeks,
+        'year': timestamps.dt.year,
+        'month': timestamps.dt.month,
+        'day_of_week': timestamps.dt.dayofweek,
+        'hour': timestamps.dt.hour,
+        'video_id': df['video_id'] if 'video_id' in df else None,
+        'channel_id': df['channel_id'] if 'channel_id' in df else None,
+        'channel': channels,
+        'session_id': session_ids
+    })
+
+    grouped = pd.Series(timestamps.to_numpy()).groupby(session_ids)
+    started, ended = grouped.min(), grouped.max()
+    sessions = pd.DataFrame({
+        'session_id': started.index,
+        'started_at': started.dt.strftime('%Y-%m-%d %H:%M:%S').to_numpy(),
+        'ended_at': ended.dt.strftime('%Y-%m-%d %H:%M:%S').to_numpy(),
+        'videos': grouped.size().to_numpy(),
+        'minutes': ((ended - started).dt.total_seconds() / 60).to_numpy()
+    })
+
+    categories = categorize_content(pd.DataFrame({'title_id': np.arange(len(titles)), 'title': titles}))
+    categories = categories.explode('categories').rename(columns={'categories': 'category'})
+    return {'history': history, 'sessions': sessions, 'categories': categories[['title_id', 'category']]}
+
+def insert_frame(connection, engine, table, frame):
+    """Bulk insert a DataFrame into an existing table."""
+    if engine == 'duckdb':
+        connection.register('frame_to_insert', frame)
+        connection.execute(f'INSERT INTO {table} SELECT * FROM frame_to_insert')
+        connection.unregister('frame_to_insert')
+        return
+    # Missing values become NULL rather than NaN
+    columns = [values.astype(object).where(values.notna(), None).tolist() if values.dtype == object or values.isna().any()
+               else values.tolist() for _, values in frame.items()]
+    placeholders = ', '.join('?' * len(frame.columns))
+    connection.executemany(f'INSERT INTO {table} VALUES ({placeholders})', zip(*columns))
+
+def check_identifier(name):
+    if not IDENTIFIER.match(name) or name in TABLES or name == VIEWS_TABLE:
+        raise ValueError(f"Invalid view name '{name}': use letters, digits and underscores, not a table name")
+
+def saved_views(path, engine):
+    """Definitions of the materialized views in an existing database."""
+    if not os.path.exists(path):
+        return {}
+    connection = connect(path, engine)
+    try:
+        return dict(connection.execute(f'SELECT name, query FROM {VIEWS_TABLE}').fetchall())
+    except Exception:
+        # Unreadable, or not a database built by this module
+        return {}
+    finally:
+        connection.close()
+
+def build_database(df, path, engine='sqlite'):
+    """Load the tables into a new database file and swap it in place of the old one.
+
+    Materialized views defined in the old database are recreated; one whose
+    query no longer runs is skipped with a warning.
+
+    Returns:
+        dict: rows per table
+    """
+    views = dict(DEFAULT_VIEWS, **saved_views(path, engine))
+    tables = build_tables(df)
+
+    temporary = path + '.tmp'
+    if os.path.exists(temporary):
+        os.remove(temporary)
+    connection = connect(temporary, engine)
+    try:
+        if engine == 'sqlite':
+            # The file only becomes visible once complete, so durability during the load is not needed
+            connection.execute('PRAGMA journal_mode = OFF')
+            connection.execute('PRAGMA synchronous = OFF')
+        for name, ddl in TABLES.items():
+            connection.execute(ddl)
+            insert_frame(connection, engine, name, tables[name])
+        for name, columns in INDEXES.items():
+            connection.execute(f'CREATE INDEX {name} ON {columns}')
+        connection.execute(f'CREATE TABLE {VIEWS_TABLE} (name TEXT PRIMARY KEY, query TEXT NOT NULL, refreshed_at TEXT)')
+        for name, query in views.items():
+            try:
+                materialize(connection, name, query)
+            except engine_errors() + (ValueError,) as e:
+                print(f"⚠️  Skipped materialized view '{name}': {e}\n    {query}")
+        connection.execute('ANALYZE')
+        connection.commit()
+        connection.close()
+        os.replace(temporary, path)
+    finally:
+        # A failed build leaves the previous database and no partial file behind
+        connection.close()
+        if os.path.exists(temporary):
+            os.remove(temporary)
+    return {name: len(frame) for name, frame in tables.items()}
+
+def materialize(connection, name, query):
+    """Store the result of query as table name and remember the query for refreshes."""
+    check_identifier(name)
+    connection.execute(f'DROP TABLE IF EXISTS {name}')
+    connection.execute(f'CREATE TABLE {name} AS {query}')
+    connection.execute(f'DELETE FROM {VIEWS_TABLE} WHERE name = ?', [name])
+    connection.execute(f'INSERT INTO {VIEWS_TABLE} VALUES (?, ?, ?)', [name, query, datetime.now().isoformat()])
+
+class WatchHistoryDB:
+    """Python API over the analytics database.
+
+    Example:
+        with WatchHistoryDB() as db:
+            db.query("SELECT hour, COUNT(*) AS videos FROM history WHERE year = ? GROUP BY hour", [2024])
+    """
+
+    def __init__(self, path=None, engine='sqlite'):
+        self.engine = engine
+        self.path = path or database_file(engine)
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"{self.path} does not exist; run 'python sql_analytics.py build' first")
+        self.connection = connect(self.path, engine)
+
+    def query(self, sql, params=()):
+        """Run a query and return its result as a DataFrame."""
+        cursor = self.connection.execute(sql, list(params))
+        columns = [column[0] for column in cursor.description]
+        return pd.DataFrame(cursor.fetchall(), columns=columns)
+
+    def materialize(self, name, sql):
+        """Create or replace a materialized view."""
+        materialize(self.connection, name, sql)
+        self.connection.commit()
+
+    def refresh(self, name=None):
+        """Recompute one materialized view, or all of them."""
+        views = self.views()
+        names = [name] if name else list(views['name'])
+        for view in names:
+            if view not in set(views['name']):
+                raise KeyError(f"No materialized view named '{view}'")
+            materialize(self.connection, view, views.loc[views['name'] == view, 'query'].iloc[0])
+        self.connection.commit()
+        return names
+
+    def drop(self, name):
+        """Remove a materialized view."""
+        check_identifier(name)
+        self.connection.execute(f'DROP TABLE IF EXISTS {name}')
+        self.connection.execute(f'DELETE FROM {VIEWS_TABLE} WHERE name = ?', [name])
+        self.connection.commit()
+
+    def views(self):
+        """Materialized views with their queries and last refresh time."""
+        return self.query(f'SELECT name, query, refreshed_at FROM {VIEWS_TABLE} ORDER BY name')
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def read_reference(path):
+    """A stage output as a DataFrame; 'key: value' text files become a single row."""
+    if path.endswith('.txt'):
+        with open(path, 'r') as f:
+            pairs = [line.split(': ', 1) for line in f.read().splitlines() if ': ' in line]
+        return pd.DataFrame([{key: float(value) for key, value in pairs}])
+    return pd.read_csv(path, keep_default_na=False)
+
+def same_result(result, reference):
+    """Whether a query result has the same rows as the stage output, ignoring row order."""
+    if not set(result.columns) <= set(reference.columns) or len(result) != len(reference):
+        return False
+    reference = reference[list(result.columns)]
+
+    def normalized(frame):
+        columns = {}
+        for column in frame.columns:
+            values = pd.to_numeric(frame[column], errors='coerce')
+            columns[column] = values.astype(float).round(6).astype(str) if values.notna().all() else frame[column].astype(str)
+        return pd.DataFrame(columns).sort_values(list(frame.columns)).reset_index(drop=True)
+
+    return normalized(result).equals(normalized(reference))
+
+def benchmark_queries(db, repeat=5):
+    """Time every stage query and check it against the stage's output where there is one."""
+    results = []
+    outputs_root = os.path.dirname(output_dir)
+    for name, (reference, sql) in STAGE_QUERIES.items():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = db.query(sql)
+            timings.append(time.perf_counter() - started)
+        matches = None
+        if reference and os.path.exists(os.path.join(outputs_root, reference)):
+            matches = same_result(result, read_reference(os.path.join(outputs_root, reference)))
+        results.append({
+            'query': name,
+            'rows': len(result),
+            'median_seconds': round(statistics.median(timings), 6),
+            'min_seconds': round(min(timings), 6),
+            'matches_stage_output': matches
+        })
+    return results
+
+def run_benchmark(engine, repeat):
+    """Benchmark the stage queries and save the timings next to the database."""
+    # What every ad-hoc pandas script pays before it can answer anything
+    started = time.perf_counter()
+    pd.read_csv(input_file)
+    csv_load_seconds = time.perf_counter() - started
+
+    with WatchHistoryDB(engine=engine) as db:
+        results = benchmark_queries(db, repeat)
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'engine': engine,
+        'repeat': repeat,
+        'csv_load_seconds': round(csv_load_seconds, 4),
+        'results': results
+    }
+    with open(os.path.join(output_dir, f'query_benchmark_{engine}.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"CSV load for comparison: {csv_load_seconds:.3f}s")
+    for result in results:
+        check = {True: '✅', False: '❌', None: '  '}[result['matches_stage_output']]
+        print(f"{check} {result['query']:<28} {result['median_seconds'] * 1000:>9.2f} ms  {result['rows']:>8} rows")
+    mismatches = [r['query'] for r in results if r['matches_stage_output'] is False]
+    if mismatches:
+        print(f"⚠️  Results differ from the stage outputs for: {', '.join(mismatches)}")
+    return report
+
+def main(engine='sqlite'):
+    """Build the analytics database from the cleaned watch history."""
+    os.makedirs(output_dir, exist_ok=True)
+    with track('load') as metrics:
+        df = pd.read_csv(input_file)
+        metrics['rows'] = len(df)
+        metrics['bytes_read'] = os.path.getsize(input_file)
+    with track('build', output_dir=output_dir) as metrics:
+        counts = build_database(df, database_file(engine), engine)
+        metrics['rows'] = len(df)
+
+    print(f"SQL database built: {database_file(engine)}")
+    print(', '.join(f"{table}: {rows} rows" for table, rows in counts.items()))
+
+def cli():
+    """Command line interface; without a command the database is (re)built."""
+    parser = argparse.ArgumentParser(description='SQL analytics over the watch history')
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='sqlite')
+    commands = parser.add_subparsers(dest='command')
+    commands.add_parser('build', help='Load the cleaned data into the database')
+    query = commands.add_parser('query', help='Run a SQL query')
+    query.add_argument('sql')
+    query.add_argument('--output', help='Write the result to this CSV file instead of printing it')
+    view = commands.add_parser('materialize', help='Create or replace a materialized view')
+    view.add_argument('name')
+    view.add_argument('sql')
+    refresh = commands.add_parser('refresh', help='Recompute materialized views')
+    refresh.add_argument('name', nargs='?')
+    drop = commands.add_parser('drop', help='Remove a materialized view')
+    drop.add_argument('name')
+    commands.add_parser('views', help='List materialized views')
+    benchmark = commands.add_parser('benchmark', help='Time the stage queries and check them against stage outputs')
+    benchmark.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        if args.command in (None, 'build'):
+            main(args.engine)
+            return
+        if args.command == 'benchmark':
+            run_benchmark(args.engine, args.repeat)
+            return
+        with WatchHistoryDB(engine=args.engine) as db:
+            if args.command == 'query':
+                result = db.query(args.sql)
+                if args.output:
+                    result.to_csv(args.output, index=False)
+                    print(f"{len(result)} rows written to {args.output}")
+                else:
+                    print(result.to_string(index=False))
+            elif args.command == 'materialize':
+                db.materialize(args.name, args.sql)
+                print(f"Materialized view '{args.name}' created")
+            elif args.command == 'refresh':
+                print(f"Refreshed: {', '.join(db.refresh(args.name)) or 'nothing'}")
+            elif args.command == 'drop':
+                db.drop(args.name)
+                print(f"Materialized view '{args.name}' removed")
+            else:
+                print(db.views().to_string(index=False))
+    except engine_errors() + (ImportError, ValueError, KeyError, FileNotFoundError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    cli()
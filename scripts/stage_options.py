@@ -0,0 +1,48 @@
+"""
+Stage Options
+
+Run-time switches shared by the analysis stages. Each option can be given
+on a stage's command line or through an environment variable, so the
+pipeline runner can pass it to every stage it launches.
+"""
+
+import os
+import sys
+
+NO_PLOTS_VAR = 'YTA_NO_PLOTS'
+
+def plots_enabled():
+    """Whether stages should render charts (disabled by --no-plots or YTA_NO_PLOTS=1)."""
+    return '--no-plots' not in sys.argv and os.environ.get(NO_PLOTS_VAR) != '1'
+
+CHUNK_SIZE_VAR = 'YTA_CHUNK_SIZE'
+
+def option_value(flag):
+    """Value of '--flag value' or '--flag=value' on the command line, if given."""
+    for position, argument in enumerate(sys.argv):
+        if argument == flag and position + 1 < len(sys.argv):
+            return sys.argv[position + 1]
+        if argument.startswith(flag + '='):
+            return argument.split('=', 1)[1]
+    return None
+
+def chunk_size():
+    """Rows per chunk for out-of-core processing (--chunk-size or YTA_CHUNK_SIZE).
+
+    Returns None when neither is set, meaning the whole dataset is loaded
+    into memory as before.
+    """
+    value = option_value('--chunk-size') or os.environ.get(CHUNK_SIZE_VAR)
+    return int(value) if value else None
+
+SKETCH_VAR = 'YTA_SKETCH'
+
+def sketch_mode():
+    """Whether channel analytics use approximate sketches (--sketch or YTA_SKETCH=1)."""
+    return '--sketch' in sys.argv or os.environ.get(SKETCH_VAR) == '1'
+
+FULL_VAR = 'YTA_FULL'
+
+def full_recompute():
+    """Whether incremental stages rebuild their saved state (--full or YTA_FULL=1)."""
+    return '--full' in sys.argv or os.environ.get(FULL_VAR) == '1'
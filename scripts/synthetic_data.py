@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Synthetic Watch History Generator
+
+Generates deterministic, Takeout-format YouTube watch history JSON files for
+benchmarks and testing without touching a real personal export.
+
+Titles follow a Zipf popularity distribution over a configurable pool, each
+title belongs to one channel, and watch times cluster in the evening.
+"""
+
+import os
+import json
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Words used to build titles; includes keywords the content categories match
+TITLE_WORDS = [
+    'drag', 'rupaul', 'queen', 'pride', 'music', 'song', 'album', 'concert', 'live',
+    'podcast', 'interview', 'episode', 'comedy', 'funny', 'tutorial', 'guide', 'tips',
+    'news', 'politics', 'game', 'gameplay', 'travel', 'trip', 'recipe', 'cooking',
+    'tech', 'review', 'norwegian', 'pop', 'vlog', 'reaction', 'official', 'video',
+    'best', 'new', 'full', 'day', 'night', 'week', 'story', 'top', 'ten', 'the', 'my'
+]
+
+# Relative likelihood of watching at each hour of the day
+HOUR_WEIGHTS = np.array([3, 2, 1, 1, 1, 1, 1, 2, 3, 3, 3, 4,
+                         5, 4, 4, 4, 5, 6, 7, 8, 9, 9, 7, 5], dtype=float)
+
+ID_ALPHABET = np.array(list('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_'))
+
+def random_ids(rng, count, length, prefix=''):
+    """Generate YouTube-style identifiers from the URL-safe alphabet."""
+    characters = ID_ALPHABET[rng.integers(0, len(ID_ALPHABET), size=(count, length))]
+    return [prefix + ''.join(row) for row in characters]
+
+def build_title_pool(rng, titles, channels, channel_skew):
+    """Create the pool of distinct titles, each tied to one channel."""
+    channel_names = [f"Creator {i}" for i in range(channels)]
+    channel_ids = random_ids(rng, channels, 22, prefix='UC')
+    title_channels = (rng.zipf(channel_skew, titles) - 1) % channels
+    words = rng.choice(TITLE_WORDS, size=(titles, 4))
+    patterns = rng.integers(0, 4, titles)
+
+    # Mix the title shapes that channel extraction recognises
+    pool = []
+    for i in range(titles):
+        channel = channel_names[title_channels[i]]
+        text = f"{' '.join(words[i])} {i}"
+        if patterns[i] == 0:
+            pool.append(f"{channel} - {text}")
+        elif patterns[i] == 1:
+            pool.append(f"{text} | {channel}")
+        elif patterns[i] == 2:
+            pool.append(f"{channel}: {text}")
+        else:
+            pool.append(text.capitalize())
+
+    return pd.DataFrame({
+        'title': pool,
+        'video_id': random_ids(rng, titles, 11),
+        'channel_name': np.array(channel_names)[title_channels],
+        'channel_id': np.array(channel_ids)[title_channels]
+    })
+
+def generate_watch_history(rows, start_year=2020, end_year=2025, channels=500, titles=None,
+                           title_skew=1.2, channel_skew=1.1, seed=42):
+    """Generate a synthetic watch history.
+
+    Args:
+        rows: Number of watch events
+        start_year: First year covered
+        end_year: Last year covered (inclusive)
+        channels: Number of distinct channels
+        titles: Number of distinct titles (defaults to a fifth of rows)
+        title_skew: Zipf exponent for title popularity (higher means more rewatches)
+        channel_skew: Zipf exponent for how titles are spread over channels
+        seed: Random seed; the same arguments always give the same data
+
+    Returns:
+        DataFrame: One row per watch event, newest first, with title,
+        video_id, channel_name, channel_id and timestamp columns
+    """
+    rng = np.random.default_rng(seed)
+    titles = titles or max(rows // 5, 1)
+    pool = build_title_pool(rng, titles, channels, channel_skew)
+
+    # Popular titles are watched many times, the long tail once or twice
+    picks = (rng.zipf(title_skew, rows) - 1) % titles
+    history = pool.iloc[picks].reset_index(drop=True)
+
+    first_day = pd.Timestamp(f'{start_year}-01-01')
+    days = (pd.Timestamp(f'{end_year + 1}-01-01') - first_day).days
+    offsets = (rng.integers(0, days, rows) * 86400
+               + rng.choice(24, size=rows, p=HOUR_WEIGHTS / HOUR_WEIGHTS.sum()) * 3600
+               + rng.integers(0, 3600, rows))
+    history['timestamp'] = first_day + pd.to_timedelta(offsets, unit='s')
+
+    return history.sort_values('timestamp', ascending=False, kind='stable').reset_index(drop=True)
+
+def to_takeout_records(history, export_format='date_watched'):
+    """Convert a generated history into export records.
+
+    'date_watched' produces the {title, date_watched} shape read by
+    data_preparation; 'takeout' produces the official Google Takeout shape
+    with header, "Watched ..." titles, titleUrl, subtitles and ISO time.
+    """
+    if export_format == 'date_watched':
+        records = pd.DataFrame({
+            'title': history['title'],
+            'date_watched': history['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        })
+        return records.to_dict('records')
+
+    records = []
+    for title, video_id, channel_name, channel_id, timestamp in zip(
+            history['title'], history['video_id'], history['channel_name'],
+            history['channel_id'], history['timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%S.000Z')):
+        records.append({
+            'header': 'YouTube',
+            'title': f"Watched {title}",
+            'titleUrl': f"https://www.youtube.com/watch?v={video_id}",
+            'subtitles': [{'name': channel_name, 'url': f"https://www.youtube.com/channel/{channel_id}"}],
+            'time': timestamp,
+            'products': ['YouTube'],
+            'activityControls': ['YouTube watch history']
+        })
+    return records
+
+def write_takeout_files(history, directory, export_format='date_watched'):
+    """Write one JSON export file per year into directory and return their paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for year, year_history in history.groupby(history['timestamp'].dt.year, sort=True):
+        path = os.path.join(directory, f'watch-history-{year}.json')
+        with open(path, 'w') as f:
+            json.dump(to_takeout_records(year_history, export_format), f)
+        paths.append(path)
+    return paths
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description='Generate a synthetic YouTube watch history export')
+    parser.add_argument('--rows', type=int, default=10000, help='Number of watch events')
+    parser.add_argument('--output-dir', required=True, help='Directory for the JSON export files')
+    parser.add_argument('--start-year', type=int, default=2020)
+    parser.add_argument('--end-year', type=int, default=2025)
+    parser.add_argument('--channels', type=int, default=500, help='Distinct channels')
+    parser.add_argument('--titles', type=int, help='Distinct titles (default: rows / 5)')
+    parser.add_argument('--title-skew', type=float, default=1.2, help='Zipf exponent for title popularity')
+    parser.add_argument('--channel-skew', type=float, default=1.1, help='Zipf exponent for channel popularity')
+    parser.add_argument('--format', choices=['date_watched', 'takeout'], default='date_watched')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    history = generate_watch_history(args.rows, args.start_year, args.end_year, args.channels,
+                                     args.titles, args.title_skew, args.channel_skew, args.seed)
+    paths = write_takeout_files(history, args.output_dir, args.format)
+    print(f"Generated {len(history)} watch events in {len(paths)} files under {args.output_dir}")
+
+if __name__ == "__main__":
+    main()
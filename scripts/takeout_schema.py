@@ -0,0 +1,288 @@
+"""
+Takeout Schema Validation
+
+Explicit schema for the two watch-history export shapes and a vectorized
+validator for them:
+
+- 'date_watched': {"title": "...", "date_watched": "YYYY-MM-DD HH:MM:SS"}
+- 'takeout': the official Google Takeout shape, {"title": "Watched ...",
+  "time": ISO 8601, "titleUrl": ..., "subtitles": [{"name", "url"}], ...}
+
+Each record is checked against the schema of its shape with whole-column
+operations. Records failing a required field are rejected with their
+reasons instead of failing the file; invalid optional fields are blanked
+and counted. A file that is not valid JSON is salvaged record by record.
+"""
+
+import json
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+SCHEMAS = {
+    'date_watched': {
+        'required': {'title': 'string', 'date_watched': 'timestamp'},
+        'optional': {},
+        'time_format': '%Y-%m-%d %H:%M:%S'
+    },
+    'takeout': {
+        'required': {'title': 'string', 'time': 'timestamp'},
+        'optional': {'titleUrl': 'url', 'subtitles': 'list'},
+        'time_format': 'ISO8601',
+        # Takeout titles read "Watched <video title>"
+        'title_prefix': 'Watched '
+    }
+}
+
+URL_PREFIX = 'https://'
+
+# Video and channel IDs inside Takeout URLs; the prefixes cover nearly all entries
+# and are sliced directly, other URL shapes go through the patterns
+VIDEO_URL_PREFIX = 'https://www.youtube.com/watch?v='
+VIDEO_ID_PATTERN = r'(?:[?&]v=|youtu\.be/)([\w-]{11})'
+VIDEO_ID_LENGTH = 11
+CHANNEL_URL_PREFIX = 'https://www.youtube.com/channel/'
+CHANNEL_ID_PATTERN = r'/channel/([\w-]+)'
+
+# pandas' inferred type for columns made up entirely of one Python type
+INFERRED_TYPES = {str: 'string'}
+
+def record_format(frame):
+    """Export shape of each record: 'takeout' when it has a 'time' field, or Takeout fields and no 'date_watched'."""
+    def has(field):
+        return frame[field].notna().to_numpy() if field in frame else np.zeros(len(frame), dtype=bool)
+
+    takeout = has('time') | (~has('date_watched') & (has('header') | has('titleUrl')))
+    return np.where(takeout, 'takeout', 'date_watched')
+
+def is_type(column, python_type):
+    """Whether each value in an object column is an instance of python_type."""
+    # Fast path: a column-wide type check instead of one call per value
+    if INFERRED_TYPES.get(python_type) == pd.api.types.infer_dtype(column, skipna=False):
+        return np.ones(len(column), dtype=bool)
+    return column.map(type).eq(python_type).to_numpy()
+
+def parse_timestamps(column, time_format):
+    """Parse timestamps; values that are not strings or do not parse become NaT.
+
+    Takeout times are UTC and are stored as naive UTC timestamps.
+    """
+    strings = column.where(is_type(column, str))
+    if time_format == 'ISO8601':
+        parsed = pd.to_datetime(strings, format='ISO8601', utc=True, errors='coerce')
+        return parsed.dt.tz_localize(None)
+    return pd.to_datetime(strings, format=time_format, errors='coerce')
+
+def check_format(frame, schema):
+    """Validate records of one shape.
+
+    Returns:
+        tuple: (dict of reason -> boolean rejection mask, cleaned columns,
+                Counter of blanked optional fields)
+    """
+    failures = {}
+    columns = {}
+
+    for field, kind in schema['required'].items():
+        values = frame[field] if field in frame else pd.Series(np.nan, index=frame.index, dtype=object)
+        missing = values.isna().to_numpy()
+        failures[f'missing {field}'] = missing
+        if kind == 'string':
+            strings = is_type(values, str)
+            failures[f'{field} is not a string'] = ~missing & ~strings
+            text = values.where(strings, '')
+            if field == 'title' and 'title_prefix' in schema:
+                text = text.str.removeprefix(schema['title_prefix'])
+            failures[f'empty {field}'] = strings & (text.eq('') | text.str.isspace()).to_numpy()
+            columns[field] = text
+        else:
+            timestamps = parse_timestamps(values, schema['time_format'])
+            failures[f'invalid {field}'] = ~missing & timestamps.isna().to_numpy()
+            columns[field] = values
+            columns['timestamp'] = timestamps
+
+    blanked = Counter()
+    for field, kind in schema['optional'].items():
+        if field not in frame:
+            continue
+        values = frame[field]
+        present = values.notna().to_numpy()
+        if kind == 'url':
+            valid = is_type(values, str) & values.where(is_type(values, str), '').str.startswith(URL_PREFIX).to_numpy()
+        else:
+            valid = is_type(values, list)
+        invalid = present & ~valid
+        blanked[f'invalid {field}'] += int(invalid.sum())
+        columns[field] = values.where(~invalid)
+
+    return failures, pd.DataFrame(columns, index=frame.index), blanked
+
+def validate_records(records, source):
+    """Split parsed export records into valid rows and rejected entries.
+
+    Returns:
+        tuple: (DataFrame of valid rows with a parsed 'timestamp', list of
+                rejected entries with their reasons, Counter of outcomes)
+    """
+    counters = Counter(records=len(records))
+    is_record = np.fromiter((isinstance(r, dict) for r in records), dtype=bool, count=len(records))
+    rejected = [{'source': source, 'index': int(i), 'reasons': ['entry is not an object'], 'entry': records[i]}
+                for i in np.flatnonzero(~is_record)]
+    counters['entry is not an object'] += len(rejected)
+
+    if rejected:
+        positions = np.flatnonzero(is_record)
+        frame = pd.DataFrame.from_records([records[i] for i in positions], index=positions)
+    else:
+        frame = pd.DataFrame.from_records(records)
+    formats = record_format(frame)
+
+    valid_parts = []
+    for name, schema in SCHEMAS.items():
+        part = frame[formats == name]
+        if part.empty:
+            continue
+        counters[f'format {name}'] += len(part)
+        failures, cleaned, blanked = check_format(part, schema)
+        counters.update(blanked)
+
+        reject = np.logical_or.reduce(list(failures.values()))
+        for reason, mask in failures.items():
+            if mask.any():
+                counters[reason] += int(mask.sum())
+        # Reasons are only assembled for the (few) rejected rows
+        for row in np.flatnonzero(reject):
+            index = int(part.index[row])
+            rejected.append({
+                'source': source,
+                'index': index,
+                'reasons': [reason for reason, mask in failures.items() if mask[row]],
+                'entry': records[index]
+            })
+        valid_parts.append(cleaned[~reject])
+
+    valid = pd.concat(valid_parts).sort_index() if valid_parts else pd.DataFrame(columns=['title', 'timestamp'])
+    counters['valid'] = len(valid)
+    counters['rejected'] = len(rejected)
+    return valid.reset_index(drop=True), rejected, counters
+
+def extract_id(urls, prefix, pattern, length=None):
+    """ID following prefix in each URL, with a regex fallback for other URL shapes."""
+    urls = urls.fillna('').astype(str)
+    ids = urls.str.slice(len(prefix), len(prefix) + length if length else None)
+    other = ~urls.str.startswith(prefix) & urls.ne('')
+    ids[urls.eq('')] = np.nan
+    if other.any():
+        ids[other] = urls[other].str.extract(pattern, expand=False)
+    return ids
+
+def first_subtitle(subtitles):
+    """Name and URL of the first subtitle (the channel) of each entry."""
+    # One pass over the nested lists; everything after this is column-wise
+    pairs = [(s[0].get('name'), s[0].get('url')) if isinstance(s, list) and s and isinstance(s[0], dict)
+             else (None, None) for s in subtitles]
+    return pd.DataFrame(pairs, columns=['name', 'url'], index=subtitles.index)
+
+def extract_metadata(frame):
+    """Video ID from titleUrl and channel name and ID from the first subtitle.
+
+    Columns are integer-coded categoricals and missing where the export has
+    no such field (the date_watched shape, removed videos).
+    """
+    missing = pd.Series(np.nan, index=frame.index, dtype=object)
+    video_ids = extract_id(frame['titleUrl'] if 'titleUrl' in frame else missing,
+                           VIDEO_URL_PREFIX, VIDEO_ID_PATTERN, VIDEO_ID_LENGTH)
+    subtitles = frame['subtitles'] if 'subtitles' in frame else missing
+
+    # A video's channel is the same in every entry, so the nested subtitles are read once per video
+    has_video = video_ids.notna()
+    first_entry = ~video_ids.duplicated() | ~has_video
+    channels = first_subtitle(subtitles[first_entry])
+    by_video = channels[has_video[first_entry]].set_axis(video_ids[first_entry & has_video])
+    repeats = by_video.reindex(video_ids[~first_entry]).set_axis(video_ids.index[~first_entry])
+    channels = pd.concat([channels, repeats]).reindex(frame.index)
+
+    return pd.DataFrame({
+        'video_id': video_ids,
+        'channel_id': extract_id(channels['url'], CHANNEL_URL_PREFIX, CHANNEL_ID_PATTERN),
+        'channel_name': channels['name']
+    }, index=frame.index).astype('category')
+
+def next_record_start(text, position):
+    """Index of the next '{' that opens a top-level record after position, or -1.
+
+    Scans from the start of a record that failed to decode, skipping strings
+    and tracking nesting, and resyncs only at a '{' that follows '[' or '},'
+    at array depth 1, so objects nested in the broken record (subtitles,
+    details) are not mistaken for records.
+    """
+    depth = 1
+    in_string = escaped = False
+    previous = before_previous = ''
+    for index in range(position, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char.isspace():
+            continue
+        if char == '"':
+            in_string = True
+        elif char in '[{':
+            if char == '{' and depth == 1 and (previous == '[' or (previous, before_previous) == (',', '}')):
+                return index
+            depth += 1
+        elif char in ']}':
+            depth -= 1
+        before_previous, previous = previous, char
+    return -1
+
+def salvage_records(text):
+    """Recover the records of an export array that is not valid JSON as a whole.
+
+    Every top-level object that still decodes is kept; each fragment that
+    does not is returned so it can be quarantined.
+
+    Returns:
+        tuple: (list of decoded records, list of undecodable fragments)
+    """
+    decoder = json.JSONDecoder()
+    records = []
+    fragments = []
+    position = text.find('[') + 1
+    while True:
+        start = text.find('{', position)
+        if start == -1:
+            break
+        try:
+            record, position = decoder.raw_decode(text, start)
+            records.append(record)
+        except json.JSONDecodeError:
+            next_start = next_record_start(text, start)
+            fragments.append(text[start:next_start if next_start != -1 else len(text)][:500])
+            if next_start == -1:
+                break
+            position = next_start
+    return records, fragments
+
+def read_export(path):
+    """Read one export file, salvaging what it can if the JSON is malformed.
+
+    Returns:
+        tuple: (list of records, list of undecodable fragments)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return salvage_records(text)
+    if not isinstance(data, list):
+        return [], [text[:500]]
+    return data, []
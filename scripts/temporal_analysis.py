@@ -1,9 +1,11 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
 import os
 
+from instrumentation import track
+from out_of_core import iter_chunks, merge_counts, require_rows
+from stage_options import plots_enabled, chunk_size
+
 # Input and output paths
 input_file = os.path.expanduser('~/Developer/youtube-analysis/output/cleaned_watch_history.csv')
 output_dir = os.path.expanduser('~/Developer/youtube-analysis/output/temporal_analysis')
@@ -12,31 +14,46 @@ def load_data():
     """Load the cleaned watch history data."""
     df = pd.read_csv(input_file)
     df['timestamp'] = pd.to_datetime(df['timestamp'])
-    
-    # Extract temporal features
+    df = add_temporal_features(df)
+    df['date'] = df['timestamp'].dt.date
+    return df
+
+def add_temporal_features(df):
+    """Extract temporal features from the timestamp column."""
     df['year'] = df['timestamp'].dt.year
     df['month'] = df['timestamp'].dt.month
     df['day_of_week'] = df['timestamp'].dt.dayofweek
     df['hour'] = df['timestamp'].dt.hour
-    df['date'] = df['timestamp'].dt.date
-    
     return df
 
-def analyze_viewing_patterns(df):
-    """Analyze viewing patterns across different time dimensions."""
+# Count tables behind each result, keyed by result name
+COUNT_KEYS = {
+    'yearly': ['year'],
+    'monthly': ['month'],
+    'day_of_week': ['day_of_week'],
+    'hourly': ['hour'],
+    'day_hour': ['day_of_week', 'hour'],
+    # Hour-by-day counts per year, so the dashboard can filter the heatmap by year
+    'year_day_hour': ['year', 'day_of_week', 'hour']
+}
+
+def count_viewing_patterns(df):
+    """Count videos per time dimension; counts from separate chunks can be merged."""
+    return {key: df.groupby(columns).size() for key, columns in COUNT_KEYS.items()}
+
+def merge_viewing_counts(total, partial):
+    """Combine the counts of two chunks."""
+    if total is None:
+        return partial
+    return {key: merge_counts(total[key], partial[key]) for key in COUNT_KEYS}
+
+def summarize_viewing_patterns(counts):
+    """Turn count tables into the result tables and peak viewing times."""
     results = {}
     
-    # Viewing frequency by year
-    results['yearly'] = df.groupby('year').size().reset_index(name='video_count')
-    
-    # Viewing frequency by month
-    results['monthly'] = df.groupby('month').size().reset_index(name='video_count')
-    
-    # Viewing frequency by day of week
-    results['day_of_week'] = df.groupby('day_of_week').size().reset_index(name='video_count')
-    
-    # Viewing frequency by hour
-    results['hourly'] = df.groupby('hour').size().reset_index(name='video_count')
+    # Viewing frequency by year, month, day of week, hour, hour within each day and per year
+    for key in COUNT_KEYS:
+        results[key] = counts[key].sort_index().reset_index(name='video_count')
     
     # Peak viewing times
     results['peak_hour'] = results['hourly'].loc[results['hourly']['video_count'].idxmax()]
@@ -44,8 +61,29 @@ def analyze_viewing_patterns(df):
     
     return results
 
-def create_visualizations(df, results):
+def analyze_viewing_patterns(df):
+    """Analyze viewing patterns across different time dimensions."""
+    return summarize_viewing_patterns(count_viewing_patterns(df))
+
+def analyze_viewing_patterns_chunked(chunks):
+    """Analyze viewing patterns chunk by chunk with the same results as the in-memory path.
+    
+    Returns:
+        tuple: (results, number of rows processed)
+    """
+    counts = None
+    rows = 0
+    for chunk in chunks:
+        counts = merge_viewing_counts(counts, count_viewing_patterns(add_temporal_features(chunk)))
+        rows += len(chunk)
+    require_rows(rows)
+    return summarize_viewing_patterns(counts), rows
+
+def create_visualizations(results):
     """Create visualizations for temporal patterns."""
+    # Plotting libraries are only imported when charts are rendered
+    import matplotlib.pyplot as plt
+    import seaborn as sns
     
     # Set up the plotting style
     plt.style.use('default')
@@ -91,7 +129,7 @@ def create_visualizations(df, results):
     plt.close()
     
     # Create heatmap for hour-by-day viewing patterns
-    pivot_table = df.groupby(['day_of_week', 'hour']).size().unstack(fill_value=0)
+    pivot_table = results['day_hour'].pivot(index='day_of_week', columns='hour', values='video_count').fillna(0)
     
     plt.figure(figsize=(12, 6))
     sns.heatmap(pivot_table, annot=False, cmap='YlOrRd', cbar_kws={'label': 'Video Count'})
@@ -117,15 +155,30 @@ def main():
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
     
-    # Load and analyze data
-    df = load_data()
-    results = analyze_viewing_patterns(df)
+    # Load and analyze data, streaming it in chunks when --chunk-size is given
+    rows_per_chunk = chunk_size()
+    if rows_per_chunk:
+        with track('chunked_groupby') as metrics:
+            results, metrics['rows'] = analyze_viewing_patterns_chunked(
+                iter_chunks(input_file, rows_per_chunk, columns=['timestamp']))
+            metrics['bytes_read'] = os.path.getsize(input_file)
+    else:
+        with track('load') as metrics:
+            df = load_data()
+            metrics['rows'] = len(df)
+            metrics['bytes_read'] = os.path.getsize(input_file)
+        with track('groupby') as metrics:
+            results = analyze_viewing_patterns(df)
+            metrics['rows'] = len(df)
     
     # Create visualizations
-    create_visualizations(df, results)
+    if plots_enabled():
+        with track('render', output_dir=output_dir):
+            create_visualizations(results)
     
     # Save results
-    save_results(results)
+    with track('save', output_dir=output_dir):
+        save_results(results)
     
     print(f"Temporal analysis completed. Results saved to {output_dir}")
     print(f"Peak viewing hour: {results['peak_hour']['hour']}:00")
@@ -0,0 +1,206 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+
+from instrumentation import track
+from stage_options import option_value
+from content_analysis import STOP_WORDS
+from out_of_core import require_rows
+
+# Input and output paths
+input_file = os.path.expanduser('~/Developer/youtube-analysis/output/cleaned_watch_history.csv')
+output_dir = os.path.expanduser('~/Developer/youtube-analysis/output/topic_clusters')
+
+# Hashed feature space: word 1-2 grams and character 3-grams get 2**16 buckets each
+HASH_FEATURES = 2 ** 16
+DEFAULT_CLUSTERS = 30
+TOP_TERMS = 10
+BATCH_SIZE = 4096
+
+# Centers are learned from a random sample of titles; every title is then assigned to the nearest one
+FIT_SAMPLE = 200000
+
+# Retrain instead of assigning to existing clusters once new titles exceed this share
+RETRAIN_FRACTION = 0.5
+
+def load_data():
+    """Load the titles of the cleaned watch history."""
+    return pd.read_csv(input_file, usecols=['title'])
+
+def model_file():
+    return os.path.join(output_dir, 'topic_model.npz')
+
+def assignments_file():
+    return os.path.join(output_dir, 'topic_assignments.csv')
+
+def hash_titles(titles):
+    """Hash word and character n-grams of each title into one sparse count matrix."""
+    from scipy.sparse import hstack
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    common = {'n_features': HASH_FEATURES, 'alternate_sign': False, 'norm': None, 'dtype': np.float32}
+    words = HashingVectorizer(analyzer='word', ngram_range=(1, 2), stop_words=list(STOP_WORDS), **common)
+    characters = HashingVectorizer(analyzer='char_wb', ngram_range=(3, 3), **common)
+    return hstack([words.transform(titles), characters.transform(titles)]).tocsr()
+
+def inverse_document_frequency(counts):
+    """Smoothed IDF weights of every hashed feature."""
+    document_frequency = np.bincount(counts.indices, minlength=counts.shape[1])
+    return np.log((1 + counts.shape[0]) / (1 + document_frequency)) + 1
+
+def weight_features(counts, idf):
+    """Sublinear TF-IDF weighting with unit-length rows."""
+    from sklearn.preprocessing import normalize
+
+    features = counts.copy()
+    features.data = 1 + np.log(features.data)
+    features = features.multiply(idf.astype(np.float32)).tocsr()
+    return normalize(features)
+
+def fit_clusters(features, n_clusters, seed=42):
+    """Cluster unit-length title vectors with mini-batch k-means.
+
+    Returns:
+        tuple: (cluster of every title, cluster centers)
+    """
+    from sklearn.cluster import MiniBatchKMeans
+
+    rng = np.random.default_rng(seed)
+    sample = np.sort(rng.choice(features.shape[0], min(FIT_SAMPLE, features.shape[0]), replace=False))
+    model = MiniBatchKMeans(n_clusters=min(n_clusters, features.shape[0]), batch_size=BATCH_SIZE,
+                            n_init=3, random_state=seed)
+    model.fit(features[sample])
+    centers = model.cluster_centers_.astype(np.float32)
+    # Label all titles the same way new titles are labelled on later runs
+    return assign_clusters(features, centers), centers
+
+def assign_clusters(features, centers):
+    """Nearest center for each title vector, a batch of rows at a time."""
+    center_norms = (centers ** 2).sum(axis=1)
+    labels = np.empty(features.shape[0], dtype=np.int64)
+    for start in range(0, features.shape[0], BATCH_SIZE * 16):
+        batch = features[start:start + BATCH_SIZE * 16]
+        # argmin |x - c|^2 = argmax 2 x.c - |c|^2
+        labels[start:start + len(batch.indptr) - 1] = np.argmax(2 * (batch @ centers.T) - center_norms, axis=1)
+    return labels
+
+def save_model(centers, idf, n_clusters):
+    """Persist what is needed to place new titles in the existing clusters.
+
+    n_clusters is the number requested, which can exceed len(centers) when
+    there were fewer titles than clusters.
+    """
+    np.savez_compressed(model_file(), centers=centers, idf=idf.astype(np.float32),
+                        hash_features=HASH_FEATURES, n_clusters=n_clusters)
+
+def load_model(n_clusters):
+    """Read the saved clusters, or None if there are none or the feature space or cluster count changed."""
+    if not os.path.exists(model_file()) or not os.path.exists(assignments_file()):
+        return None
+    model = np.load(model_file())
+    if int(model['hash_features']) != HASH_FEATURES:
+        return None
+    if 'n_clusters' not in model or int(model['n_clusters']) != n_clusters:
+        return None
+    return model['centers'], model['idf']
+
+def top_terms(titles, labels, n_clusters, n_terms=TOP_TERMS):
+    """Most distinctive words of each cluster, scored by in-cluster count times IDF."""
+    from scipy.sparse import csr_matrix
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    vectorizer = CountVectorizer(binary=True, stop_words=list(STOP_WORDS), token_pattern=r'(?u)\b[^\W\d_]{2,}\b')
+    try:
+        presence = vectorizer.fit_transform(titles)
+    except ValueError:
+        # No words left after removing stop words and numbers
+        return [''] * n_clusters
+    vocabulary = vectorizer.get_feature_names_out()
+    membership = csr_matrix((np.ones(len(labels)), (labels, np.arange(len(labels)))),
+                            shape=(n_clusters, len(labels)))
+    cluster_counts = (membership @ presence).toarray()
+    idf = np.log(len(labels) / np.maximum(cluster_counts.sum(axis=0), 1))
+    scores = cluster_counts * idf
+
+    terms = []
+    for cluster in range(n_clusters):
+        best = np.argsort(-scores[cluster], kind='stable')[:n_terms]
+        terms.append(', '.join(vocabulary[i] for i in best if cluster_counts[cluster, i] > 0))
+    return terms
+
+def summarize_clusters(assignments, watch_counts, n_clusters):
+    """Size, watch count and top terms of every cluster."""
+    titles = assignments['title'].values
+    labels = assignments['topic'].values
+    return pd.DataFrame({
+        'topic': np.arange(n_clusters),
+        'titles': np.bincount(labels, minlength=n_clusters),
+        'watches': np.bincount(labels, weights=watch_counts.reindex(titles, fill_value=0).values,
+                               minlength=n_clusters).astype(np.int64),
+        'top_terms': top_terms(titles, labels, n_clusters)
+    }).sort_values(['watches', 'topic'], ascending=[False, True])
+
+def cluster_titles(unique_titles, n_clusters, retrain=False):
+    """Assign every distinct title to a topic, reusing saved clusters where possible.
+
+    Returns:
+        tuple: (assignments DataFrame, number of clusters, whether the model was retrained)
+    """
+    saved = None if retrain else load_model(n_clusters)
+    if saved is not None:
+        centers, idf = saved
+        assignments = pd.read_csv(assignments_file())
+        assignments = assignments[assignments['title'].isin(unique_titles)]
+        new_titles = unique_titles[~unique_titles.isin(assignments['title'])]
+        if len(new_titles) <= RETRAIN_FRACTION * len(assignments):
+            if len(new_titles):
+                labels = assign_clusters(weight_features(hash_titles(new_titles), idf), centers)
+                assignments = pd.concat([assignments, pd.DataFrame({'title': new_titles.values, 'topic': labels})],
+                                        ignore_index=True)
+            return assignments, len(centers), False
+
+    counts = hash_titles(unique_titles)
+    idf = inverse_document_frequency(counts)
+    labels, centers = fit_clusters(weight_features(counts, idf), n_clusters)
+    save_model(centers, idf, n_clusters)
+    return pd.DataFrame({'title': unique_titles.values, 'topic': labels}), len(centers), True
+
+def main():
+    """Main execution function."""
+    try:
+        import sklearn  # noqa: F401
+    except ImportError:
+        print("Topic clustering skipped (scikit-learn not installed)")
+        return
+
+    os.makedirs(output_dir, exist_ok=True)
+    n_clusters = int(option_value('--clusters') or DEFAULT_CLUSTERS)
+
+    with track('load') as metrics:
+        df = load_data()
+        watch_counts = df['title'].value_counts()
+        unique_titles = pd.Series(watch_counts.index)
+        metrics['rows'] = len(df)
+        metrics['bytes_read'] = os.path.getsize(input_file)
+        require_rows(len(unique_titles))
+
+    with track('cluster') as metrics:
+        assignments, n_clusters, retrained = cluster_titles(unique_titles, n_clusters, '--retrain' in sys.argv)
+        metrics['rows'] = len(unique_titles)
+
+    with track('summarize') as metrics:
+        clusters = summarize_clusters(assignments, watch_counts, n_clusters)
+        metrics['rows'] = len(assignments)
+
+    with track('save', output_dir=output_dir):
+        assignments.to_csv(assignments_file(), index=False)
+        clusters.to_csv(os.path.join(output_dir, 'topic_clusters.csv'), index=False)
+
+    print(f"Topic clustering completed. Results saved to {output_dir}")
+    print(f"{'Trained' if retrained else 'Reused'} {n_clusters} topics for {len(assignments)} distinct titles")
+    top = clusters.iloc[0]
+    print(f"Most watched topic: {top['top_terms']} ({top['watches']} videos)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+
+from instrumentation import track
+from stage_options import plots_enabled, full_recompute
+from content_analysis import categorize_content
+from out_of_core import require_rows
+
+# Input and output paths
+input_file = os.path.expanduser('~/Developer/youtube-analysis/output/cleaned_watch_history.csv')
+output_dir = os.path.expanduser('~/Developer/youtube-analysis/output/trend_analysis')
+
+# Rolling windows in days, and the window used for category shares
+ROLLING_WINDOWS = [7, 30, 90]
+SHARE_WINDOW = 30
+
+# Change points must leave at least this many days on each side
+MIN_SEGMENT_DAYS = 30
+MAX_CHANGE_POINTS = 20
+
+def load_data():
+    """Load the titles and timestamps of the cleaned watch history."""
+    df = pd.read_csv(input_file, usecols=['title', 'timestamp'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df
+
+def state_file():
+    """Where the daily counts are kept between runs."""
+    return os.path.join(output_dir, 'trend_state.json')
+
+def day_numbers(timestamps, start_date):
+    """Days since start_date for each timestamp."""
+    return ((timestamps.dt.normalize() - start_date) // pd.Timedelta(days=1)).to_numpy(dtype=np.int64)
+
+def category_indicators(titles):
+    """Which categories each watch belongs to, categorizing every distinct title once.
+
+    Returns:
+        tuple: (category names, boolean matrix with one row per watch)
+    """
+    codes, unique_titles = pd.factorize(titles)
+    categorized = categorize_content(pd.DataFrame({'title': unique_titles}))['categories']
+    names = sorted({category for categories in categorized for category in categories})
+    matrix = np.zeros((len(unique_titles), len(names)), dtype=bool)
+    position = {name: i for i, name in enumerate(names)}
+    for row, categories in enumerate(categorized):
+        matrix[row, [position[category] for category in categories]] = True
+    return names, matrix[codes]
+
+def rows_digest(df):
+    """Order-independent hash of the titles and timestamps of some watches."""
+    hashes = pd.util.hash_pandas_object(df[['title', 'timestamp']], index=False).to_numpy()
+    return int(hashes.sum(dtype=np.uint64))
+
+def empty_state(start_date):
+    """State before any watches are counted."""
+    return {'start_date': start_date, 'last_timestamp': None, 'rows': 0, 'digest': 0,
+            'daily': np.zeros(0, dtype=np.int64), 'categories': {}}
+
+def add_watches(state, df):
+    """Add watches to the daily totals and per-category daily counts."""
+    if df.empty:
+        return state
+    days = day_numbers(df['timestamp'], state['start_date'])
+    n_days = max(len(state['daily']), int(days.max()) + 1)
+
+    state['daily'] = np.pad(state['daily'], (0, n_days - len(state['daily'])))
+    state['daily'] += np.bincount(days, minlength=n_days)
+
+    names, indicators = category_indicators(df['title'])
+    for column, name in enumerate(names):
+        counts = state['categories'].get(name, np.zeros(0, dtype=np.int64))
+        counts = np.pad(counts, (0, n_days - len(counts)))
+        state['categories'][name] = counts + np.bincount(days[indicators[:, column]], minlength=n_days)
+    for name, counts in state['categories'].items():
+        state['categories'][name] = np.pad(counts, (0, n_days - len(counts)))
+
+    state['last_timestamp'] = max(df['timestamp'].max(), state['last_timestamp'] or df['timestamp'].max())
+    state['rows'] += len(df)
+    # Hashes add modulo 2**64, so the digest can be extended with each batch
+    state['digest'] = (state['digest'] + rows_digest(df)) % (1 << 64)
+    return state
+
+def build_state(df):
+    """Count every watch from scratch."""
+    return add_watches(empty_state(df['timestamp'].min().normalize()), df)
+
+def update_state(state, df):
+    """Add only the watches newer than the last run.
+
+    Returns None when the watches at or before the last counted timestamp
+    are not exactly the ones counted (rows added, removed or edited), in
+    which case the state has to be rebuilt.
+    """
+    new = df['timestamp'] > state['last_timestamp']
+    if len(df) - int(new.sum()) != state['rows'] or rows_digest(df[~new]) != state['digest']:
+        return None
+    return add_watches(state, df[new])
+
+def save_state(state):
+    """Write the daily counts so the next run only adds new days."""
+    data = {
+        'start_date': state['start_date'].isoformat(),
+        'last_timestamp': state['last_timestamp'].isoformat(),
+        'rows': state['rows'],
+        'digest': state['digest'],
+        'daily': state['daily'].tolist(),
+        'categories': {name: counts.tolist() for name, counts in state['categories'].items()}
+    }
+    with open(state_file(), 'w') as f:
+        json.dump(data, f)
+
+def load_state():
+    """Read the state saved by the previous run, if there is one."""
+    if not os.path.exists(state_file()):
+        return None
+    with open(state_file(), 'r') as f:
+        data = json.load(f)
+    return {
+        'start_date': pd.Timestamp(data['start_date']),
+        'last_timestamp': pd.Timestamp(data['last_timestamp']),
+        'rows': data['rows'],
+        # States saved before the digest existed can't be checked and are rebuilt
+        'digest': data.get('digest'),
+        'daily': np.asarray(data['daily'], dtype=np.int64),
+        'categories': {name: np.asarray(counts, dtype=np.int64) for name, counts in data['categories'].items()}
+    }
+
+def rolling_sum(values, window):
+    """Sum over the trailing window of days via one cumulative sum.
+
+    Works on a 1-D series or column-wise on a 2-D array. Days before the
+    first full window are NaN, as with pandas' rolling().
+    """
+    values = np.asarray(values, dtype=np.float64)
+    cumulative = np.concatenate([np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)])
+    sums = np.full(values.shape, np.nan)
+    sums[window - 1:] = cumulative[window:] - cumulative[:-window]
+    return sums
+
+def rolling_trends(state):
+    """Daily counts with rolling means over each window."""
+    dates = pd.date_range(state['start_date'], periods=len(state['daily']), freq='D')
+    trends = pd.DataFrame({'date': dates, 'video_count': state['daily']})
+    for window in ROLLING_WINDOWS:
+        trends[f'rolling_{window}d'] = rolling_sum(state['daily'], window) / window
+    return trends
+
+def category_shares(state, window=SHARE_WINDOW):
+    """Share of the trailing window's watches that fall in each category.
+
+    Titles can belong to several categories, so shares can sum to more than 1.
+    """
+    names = sorted(state['categories'])
+    matrix = np.column_stack([state['categories'][name] for name in names])
+    totals = rolling_sum(state['daily'], window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        shares = rolling_sum(matrix, window) / totals[:, None]
+    dates = pd.date_range(state['start_date'], periods=len(state['daily']), freq='D')
+    return pd.DataFrame(shares, columns=names).assign(date=dates)[['date'] + names]
+
+def noise_variance(values):
+    """Robust day-to-day variance estimate that ignores level shifts."""
+    differences = np.diff(values)
+    if len(differences) == 0:
+        return 0.0
+    mad = np.median(np.abs(differences - np.median(differences)))
+    # Differencing doubles the variance; 1.4826 scales the MAD to a standard deviation
+    return max((1.4826 * mad) ** 2 / 2, values.var() * 1e-3, 1e-9)
+
+def detect_change_points(values, min_size=MIN_SEGMENT_DAYS, max_points=MAX_CHANGE_POINTS):
+    """Find shifts in the mean daily count by binary segmentation.
+
+    Segment costs come from cumulative sums of the values and their
+    squares, so every candidate split of a segment is scored at once. A
+    split is kept while it reduces the squared error by more than a
+    BIC-style penalty.
+
+    Returns:
+        list: sorted day indices where a new segment starts
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    sums = np.concatenate([[0.0], np.cumsum(values)])
+    squares = np.concatenate([[0.0], np.cumsum(values ** 2)])
+    penalty = 2 * noise_variance(values) * np.log(max(n, 2))
+
+    def cost(start, end):
+        length = end - start
+        total = sums[end] - sums[start]
+        return squares[end] - squares[start] - total ** 2 / length
+
+    change_points = []
+    segments = [(0, n)]
+    while segments and len(change_points) < max_points:
+        start, end = segments.pop()
+        if end - start < 2 * min_size:
+            continue
+        splits = np.arange(start + min_size, end - min_size + 1)
+        gains = cost(start, end) - cost(start, splits) - cost(splits, end)
+        best = int(np.argmax(gains))
+        if gains[best] <= penalty:
+            continue
+        split = int(splits[best])
+        change_points.append(split)
+        segments.extend([(start, split), (split, end)])
+    return sorted(change_points)
+
+def describe_change_points(state, change_points):
+    """Date and mean daily count before and after each change point."""
+    dates = pd.date_range(state['start_date'], periods=len(state['daily']), freq='D')
+    bounds = [0] + change_points + [len(state['daily'])]
+    rows = []
+    for i, point in enumerate(change_points):
+        before = state['daily'][bounds[i]:point].mean()
+        after = state['daily'][point:bounds[i + 2]].mean()
+        rows.append({
+            'date': dates[point].date(),
+            'daily_avg_before': round(before, 2),
+            'daily_avg_after': round(after, 2),
+            'change': round(after / before - 1, 4) if before else None
+        })
+    return pd.DataFrame(rows, columns=['date', 'daily_avg_before', 'daily_avg_after', 'change'])
+
+def analyze_trends(state):
+    """Rolling trends, category shares and change points from the daily counts."""
+    change_points = detect_change_points(state['daily'])
+    return {
+        'daily_trends': rolling_trends(state),
+        'category_shares': category_shares(state),
+        'change_points': describe_change_points(state, change_points)
+    }
+
+def create_visualizations(results):
+    """Plot the rolling averages with the detected change points."""
+    # Plotting libraries are only imported when charts are rendered
+    import matplotlib.pyplot as plt
+
+    trends = results['daily_trends']
+    plt.figure(figsize=(15, 6))
+    for window in ROLLING_WINDOWS:
+        plt.plot(trends['date'], trends[f'rolling_{window}d'], label=f'{window}-day average')
+    for date in results['change_points']['date']:
+        plt.axvline(pd.Timestamp(date), color='grey', linestyle='--', linewidth=0.8)
+    plt.title('Daily Viewing Trend and Habit Shifts')
+    plt.xlabel('Date')
+    plt.ylabel('Videos per Day')
+    plt.legend()
+    plt.savefig(os.path.join(output_dir, 'viewing_trends.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+
+def save_results(results):
+    """Save trend analysis results to CSV files."""
+    results['daily_trends'].to_csv(os.path.join(output_dir, 'daily_trends.csv'), index=False)
+    results['category_shares'].to_csv(os.path.join(output_dir, f'category_shares_{SHARE_WINDOW}d.csv'), index=False)
+    results['change_points'].to_csv(os.path.join(output_dir, 'change_points.csv'), index=False)
+
+def main():
+    """Main execution function."""
+    os.makedirs(output_dir, exist_ok=True)
+
+    with track('load') as metrics:
+        df = load_data()
+        metrics['rows'] = len(df)
+        metrics['bytes_read'] = os.path.getsize(input_file)
+        require_rows(len(df))
+
+    # Only count watches added since the last run unless --full is given
+    with track('groupby') as metrics:
+        state = None if full_recompute() else load_state()
+        previous_rows = state['rows'] if state else 0
+        if state is not None:
+            state = update_state(state, df)
+        if state is None:
+            previous_rows = 0
+            state = build_state(df)
+        metrics['rows'] = state['rows'] - previous_rows
+
+    with track('rolling') as metrics:
+        results = analyze_trends(state)
+        metrics['rows'] = len(state['daily'])
+
+    if plots_enabled():
+        with track('render', output_dir=output_dir):
+            create_visualizations(results)
+
+    with track('save', output_dir=output_dir):
+        save_results(results)
+        save_state(state)
+
+    print(f"Trend analysis completed. Results saved to {output_dir}")
+    print(f"Counted {state['rows'] - previous_rows} new watches over {len(state['daily'])} days")
+    print(f"Detected {len(results['change_points'])} viewing habit shift(s)")
+
+if __name__ == "__main__":
+    main()
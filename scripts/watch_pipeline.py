@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Pipeline Watch Mode
+
+Polls data/UserData_YouTube (and the config files stages read) and updates
+the analysis whenever a new Takeout drop lands:
+
+- Bursts of arrivals are debounced: nothing runs until the watched files
+  have stopped changing for a quiet period, so half-copied exports are
+  never read.
+- Only new export files are ingested and merged into the cleaned data; a
+  modified or deleted export triggers a full re-ingest.
+- A stage reruns only when one of its inputs (pipeline_paths.STAGE_INPUTS)
+  changed since it last ran, compared by content hash.
+- output/ is a symlink to a version directory. Each update builds a new
+  version that hard-links the live files and copies only the outputs of
+  the stages it reruns, then replaces the symlink with os.replace once
+  every stage has succeeded, so readers never see a half-updated tree. A
+  failed or interrupted run leaves the previous version in place.
+
+Each update appends a record with the latency from file arrival to updated
+report to output/watch/watch_log.jsonl. Polling is used rather than
+inotify so the watcher runs unchanged on Linux and macOS without extra
+dependencies.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import subprocess
+from datetime import datetime
+
+from pipeline_paths import (PIPELINE_STAGES, STAGE_INPUTS, STAGE_OUTPUTS, STAGE_PATHS, default_project_dir,
+                            prepare_project_dir, project_path, load_stage)
+from instrumentation import METRICS_FILE_VAR, RUN_ID_VAR, STAGE_VAR, new_run_id
+from stage_options import NO_PLOTS_VAR
+
+DATA_DIR = STAGE_PATHS['data_preparation']['input_dir']
+STATE_FILE = 'output/watch/watch_state.json'
+LOG_FILE = 'output/watch/watch_log.jsonl'
+METRICS_FILE = 'output/metrics/pipeline_metrics.jsonl'
+
+# output/ is a symlink into VERSIONS_DIR; updates write a new version through a
+# staging project and then replace the symlink
+VERSIONS_DIR = '.output_versions'
+STAGING_DIR = '.watch_staging'
+OUTPUT_LINK_TMP = '.output_link.tmp'
+
+# Appended to by every stage, so always copied into a new version
+SHARED_OUTPUTS = ['output/metrics', 'output/watch']
+
+DEFAULT_POLL_SECONDS = 5
+DEFAULT_DEBOUNCE_SECONDS = 30
+
+def watched_inputs():
+    """Inputs outside output/ that the watcher polls, besides the export files."""
+    return sorted({path for paths in STAGE_INPUTS.values() for path in paths
+                   if path != DATA_DIR and not path.startswith('output/')})
+
+def scan_inputs(project_dir):
+    """Map every export file and watched config file to its [mtime, size]."""
+    files = {}
+    data_dir = project_path(project_dir, DATA_DIR)
+    names = [f'{DATA_DIR}/{name}' for name in os.listdir(data_dir) if name.endswith('.json')] \
+        if os.path.isdir(data_dir) else []
+    for path in names + watched_inputs():
+        try:
+            stat = os.stat(project_path(project_dir, path))
+        except OSError:
+            continue
+        files[path] = [stat.st_mtime, stat.st_size]
+    return files
+
+def diff_inputs(before, after):
+    """Paths added, modified and removed between two scans."""
+    return {
+        'added': sorted(set(after) - set(before)),
+        'modified': sorted(path for path in set(after) & set(before) if after[path] != before[path]),
+        'removed': sorted(set(before) - set(after))
+    }
+
+def file_digest(path):
+    """Content hash of a file, or None if it does not exist."""
+    if not os.path.isfile(path):
+        return None
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_state(project_dir):
+    """Files ingested so far and the input hashes each stage last ran with."""
+    path = project_path(project_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {'files': {}, 'stage_inputs': {}}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def save_state(project_dir, state):
+    path = project_path(project_dir, STATE_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(state, f, indent=2)
+
+def link_output(project_dir, version_dir):
+    """Atomically point output/ at a version directory."""
+    temporary = os.path.join(project_dir, OUTPUT_LINK_TMP)
+    if os.path.lexists(temporary):
+        os.remove(temporary)
+    os.symlink(os.path.relpath(version_dir, project_dir), temporary)
+    os.replace(temporary, project_path(project_dir, 'output'))
+
+def live_outputs(project_dir):
+    """Return the version directory output/ points at, moving a plain output/ behind a link first."""
+    output = project_path(project_dir, 'output')
+    if not os.path.islink(output):
+        initial = os.path.join(project_dir, VERSIONS_DIR, 'initial')
+        os.makedirs(os.path.dirname(initial), exist_ok=True)
+        if os.path.isdir(output):
+            os.rename(output, initial)
+        else:
+            # Interrupted during the move above
+            os.makedirs(initial, exist_ok=True)
+        link_output(project_dir, initial)
+    return os.path.realpath(output)
+
+def remove_entry(path):
+    """Delete a file, symlink or directory tree if it exists."""
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+def copy_entry(source, target, link=False):
+    """Copy a file or directory tree, or hard-link its files when link is set."""
+    if os.path.isdir(source) and not os.path.islink(source):
+        shutil.copytree(source, target, symlinks=True, copy_function=os.link if link else shutil.copy2)
+    elif link and not os.path.islink(source):
+        os.link(source, target)
+    else:
+        shutil.copy2(source, target, follow_symlinks=False)
+
+def prepare_staging(project_dir, run_id):
+    """Create a new output version and a staging project that writes to it.
+
+    Files in the new version are hard links to the live ones until
+    unshare_outputs copies the entries of a stage about to rerun, so an
+    update costs a copy of the rerun stages' outputs only.
+
+    Returns:
+        tuple: (staging project directory, new version directory)
+    """
+    live = live_outputs(project_dir)
+    version_dir = os.path.join(project_dir, VERSIONS_DIR, run_id)
+    suffix = 1
+    while os.path.lexists(version_dir):
+        # Updates less than a second apart share a run ID
+        suffix += 1
+        version_dir = os.path.join(project_dir, VERSIONS_DIR, f'{run_id}-{suffix}')
+    os.makedirs(version_dir)
+    for name in os.listdir(live):
+        copy_entry(os.path.join(live, name), os.path.join(version_dir, name),
+                   link=f'output/{name}' not in SHARED_OUTPUTS)
+
+    staging_dir = os.path.join(project_dir, STAGING_DIR)
+    remove_entry(staging_dir)
+    os.makedirs(staging_dir)
+    for name in os.listdir(project_dir):
+        if name not in ('output', VERSIONS_DIR, STAGING_DIR, OUTPUT_LINK_TMP):
+            os.symlink(os.path.join(project_dir, name), os.path.join(staging_dir, name))
+    os.symlink(version_dir, project_path(staging_dir, 'output'))
+    os.makedirs(os.path.dirname(project_path(staging_dir, METRICS_FILE)), exist_ok=True)
+    return staging_dir, version_dir
+
+def unshare_outputs(stage, live, version_dir, unshared):
+    """Replace the hard links to a stage's outputs with copies it can overwrite in place."""
+    for path in STAGE_OUTPUTS[stage]:
+        if path in unshared:
+            continue
+        name = path.split('/', 1)[1]
+        remove_entry(os.path.join(version_dir, name))
+        if os.path.lexists(os.path.join(live, name)):
+            copy_entry(os.path.join(live, name), os.path.join(version_dir, name))
+        unshared.add(path)
+
+def remove_stale_versions(project_dir):
+    """Delete output versions other than the live one and leftovers of an interrupted update."""
+    for leftover in (STAGING_DIR, OUTPUT_LINK_TMP):
+        remove_entry(os.path.join(project_dir, leftover))
+    live = live_outputs(project_dir)
+    versions = os.path.join(project_dir, VERSIONS_DIR)
+    for name in os.listdir(versions):
+        if os.path.realpath(os.path.join(versions, name)) != live:
+            remove_entry(os.path.join(versions, name))
+
+def run_stage(stage, project_dir, run_id, plots=True, files=None, append=False):
+    """Run one stage against project_dir in a fresh interpreter.
+
+    Returns:
+        tuple: (whether it succeeded, wall seconds, combined output)
+    """
+    command = [sys.executable, os.path.abspath(__file__), '--run-stage', stage, '--project-dir', project_dir]
+    if files is not None:
+        command += ['--files'] + files
+    if append:
+        command.append('--append')
+    env = dict(os.environ, MPLBACKEND='Agg', **{
+        STAGE_VAR: stage,
+        RUN_ID_VAR: run_id,
+        METRICS_FILE_VAR: project_path(project_dir, METRICS_FILE)
+    })
+    if not plots:
+        env[NO_PLOTS_VAR] = '1'
+    started = time.perf_counter()
+    completed = subprocess.run(command, capture_output=True, text=True, env=env,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+    return completed.returncode == 0, time.perf_counter() - started, completed.stdout + completed.stderr
+
+def stages_to_run(state, changes, staging_dir, digests):
+    """Yield each stage that has to rerun, hashing inputs as the stages before it produce them."""
+    ran = []
+    for stage in PIPELINE_STAGES:
+        if stage == 'data_preparation':
+            changed = any(path.startswith(DATA_DIR + '/') for paths in changes.values() for path in paths)
+        elif not STAGE_INPUTS[stage]:
+            changed = bool(ran)
+        else:
+            for path in STAGE_INPUTS[stage]:
+                if path not in digests:
+                    digests[path] = file_digest(project_path(staging_dir, path))
+            current = {path: digests[path] for path in STAGE_INPUTS[stage]}
+            changed = state['stage_inputs'].get(stage) != current
+        if changed or stage not in state['stage_inputs']:
+            ran.append(stage)
+            yield stage
+
+def update(project_dir, state, snapshot, changes, arrived_at, detected_at, plots=True):
+    """Rerun the affected stages into a new output version, switch to it and log the latency.
+
+    Returns:
+        dict: the new state, or None if a stage failed
+    """
+    started_at = time.time()
+    run_id = new_run_id('watch-')
+    data_files = {path: value for path, value in snapshot.items() if path.startswith(DATA_DIR + '/')}
+    ingested = {path for path in state['files'] if path.startswith(DATA_DIR + '/')}
+    # New exports are merged into the cleaned data; anything else means starting over
+    incremental = bool(ingested) and not any(
+        path.startswith(DATA_DIR + '/') for path in changes['modified'] + changes['removed'])
+    new_files = sorted(set(data_files) - ingested) if incremental else sorted(data_files)
+
+    staging_dir, version_dir = prepare_staging(project_dir, run_id)
+    live = live_outputs(project_dir)
+    unshared = set()
+    digests = {}
+    stage_seconds = {}
+    failed = None
+    for stage in stages_to_run(state, changes, staging_dir, digests):
+        unshare_outputs(stage, live, version_dir, unshared)
+        if stage == 'data_preparation':
+            files = [os.path.basename(path) for path in new_files]
+            success, seconds, output = run_stage(stage, staging_dir, run_id, plots, files, incremental)
+        else:
+            success, seconds, output = run_stage(stage, staging_dir, run_id, plots)
+        stage_seconds[stage] = round(seconds, 3)
+        if not success:
+            failed = stage
+            print(f"❌ {stage} failed; keeping the previous outputs:\n{output}")
+            break
+        print(f"✅ {stage} ({seconds:.2f}s)")
+
+    new_state = None
+    if failed:
+        remove_entry(staging_dir)
+        remove_entry(version_dir)
+    else:
+        new_state = {
+            'files': snapshot,
+            'stage_inputs': dict(state['stage_inputs'], **{
+                stage: {path: digests[path] if path in digests else file_digest(project_path(staging_dir, path))
+                        for path in STAGE_INPUTS[stage]}
+                for stage in stage_seconds})
+        }
+        save_state(staging_dir, new_state)
+        remove_entry(staging_dir)
+        link_output(project_dir, version_dir)
+        remove_entry(live)
+    finished_at = time.time()
+
+    record = {
+        'run_id': run_id,
+        'success': failed is None,
+        'failed_stage': failed,
+        'changes': changes,
+        'ingest': 'incremental' if incremental else 'full',
+        'files_ingested': len(new_files) if 'data_preparation' in stage_seconds else 0,
+        'stages': list(stage_seconds),
+        'stage_seconds': stage_seconds,
+        'arrived_at': datetime.fromtimestamp(arrived_at).isoformat(),
+        'detected_at': datetime.fromtimestamp(detected_at).isoformat(),
+        'started_at': datetime.fromtimestamp(started_at).isoformat(),
+        'finished_at': datetime.fromtimestamp(finished_at).isoformat(),
+        'run_seconds': round(finished_at - started_at, 3),
+        'latency_seconds': round(finished_at - arrived_at, 3)
+    }
+    log_file = project_path(project_dir, LOG_FILE)
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    with open(log_file, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+    if failed is None:
+        print(f"⏱️  Reran {len(stage_seconds)} stage(s); outputs updated {record['latency_seconds']:.1f}s "
+              f"after the files arrived ({record['run_seconds']:.1f}s of pipeline time)")
+    return new_state
+
+def arrival_time(snapshot, changes, previous_scan):
+    """Earliest time the changed files can have arrived.
+
+    A modification time after the previous scan is taken as is; older ones
+    (files copied with their original times) fall back to that scan.
+    """
+    times = [max(snapshot[path][0], previous_scan) for path in changes['added'] + changes['modified']]
+    return min(times, default=previous_scan)
+
+def watch(project_dir=default_project_dir, poll_seconds=DEFAULT_POLL_SECONDS,
+          debounce_seconds=DEFAULT_DEBOUNCE_SECONDS, once=False, plots=True):
+    """Poll for new exports and update the outputs after each burst of arrivals."""
+    prepare_project_dir(project_dir)
+    remove_stale_versions(project_dir)
+    state = load_state(project_dir)
+    print(f"👀 Watching {project_path(project_dir, DATA_DIR)} "
+          f"(poll every {poll_seconds}s, debounce {debounce_seconds}s)")
+
+    previous_scan = time.time()
+    pending = None
+    failed_snapshot = None
+    while True:
+        scanned_at = time.time()
+        snapshot = scan_inputs(project_dir)
+        changes = diff_inputs(state['files'], snapshot)
+        if not any(changes.values()) or snapshot == failed_snapshot:
+            pending = None
+            if once:
+                print("No new exports to process")
+                return
+        elif pending is None or snapshot != pending['snapshot']:
+            # Still arriving: restart the quiet period
+            arrived_at = arrival_time(snapshot, changes, previous_scan)
+            if pending is None:
+                print(f"📥 Detected {sum(len(paths) for paths in changes.values())} changed file(s), "
+                      f"waiting for arrivals to settle")
+            pending = {
+                'snapshot': snapshot,
+                'arrived_at': min(arrived_at, pending['arrived_at']) if pending else arrived_at,
+                'detected_at': pending['detected_at'] if pending else scanned_at,
+                'changed_at': scanned_at
+            }
+        elif scanned_at - pending['changed_at'] >= debounce_seconds:
+            new_state = update(project_dir, state, snapshot, changes,
+                               pending['arrived_at'], pending['detected_at'], plots)
+            if new_state is None:
+                failed_snapshot = snapshot
+            else:
+                state = new_state
+            pending = None
+            if once:
+                return
+        previous_scan = scanned_at
+        time.sleep(min(poll_seconds, debounce_seconds) if pending else poll_seconds)
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description='Update the analysis whenever new Takeout exports arrive')
+    parser.add_argument('--project-dir', default=default_project_dir)
+    parser.add_argument('--poll-seconds', type=float, default=DEFAULT_POLL_SECONDS,
+                        help='How often to check for new files')
+    parser.add_argument('--debounce-seconds', type=float, default=DEFAULT_DEBOUNCE_SECONDS,
+                        help='Wait until files have stopped changing for this long')
+    parser.add_argument('--once', action='store_true', help='Process pending changes once and exit')
+    parser.add_argument('--no-plots', action='store_true', help='Run stages without rendering charts')
+    parser.add_argument('--run-stage', help=argparse.SUPPRESS)
+    parser.add_argument('--files', nargs='*', help=argparse.SUPPRESS)
+    parser.add_argument('--append', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Child mode: run a single stage against the staging project
+    if args.run_stage:
+        module = load_stage(args.run_stage, args.project_dir)
+        if args.run_stage == 'data_preparation':
+            module.main(args.files, args.append)
+        else:
+            module.main()
+        return
+
+    try:
+        watch(os.path.abspath(args.project_dir), args.poll_seconds, args.debounce_seconds,
+              args.once, plots=not args.no_plots)
+    except KeyboardInterrupt:
+        print("\nWatch mode stopped")
+
+if __name__ == "__main__":
+    main()
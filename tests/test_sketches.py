@@ -0,0 +1,94 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from sketches import SpaceSaving, CountMinSketch, HyperLogLog
+
+def skewed_stream(size, distinct, seed=0):
+    """Channel names drawn with Zipf-like popularity, most popular first."""
+    rng = np.random.default_rng(seed)
+    weights = 1 / np.arange(1, distinct + 1) ** 1.2
+    picks = rng.choice(distinct, size=size, p=weights / weights.sum())
+    return np.array([f'Channel {i}' for i in picks], dtype=object)
+
+class CountMinSketchTest(unittest.TestCase):
+    def test_estimates_never_undercount_and_stay_within_bound(self):
+        stream = skewed_stream(50000, 5000)
+        sketch = CountMinSketch(width=1024, depth=5)
+        for chunk in np.array_split(stream, 7):
+            sketch.add(chunk)
+        exact = pd.Series(stream).value_counts()
+
+        estimates = sketch.estimate(exact.index.to_numpy())
+
+        self.assertTrue((estimates >= exact.to_numpy()).all())
+        # e * N / width bounds each overcount with probability 1 - exp(-depth) per item
+        within = (estimates - exact.to_numpy()) <= sketch.max_error()
+        self.assertGreaterEqual(within.mean(), 1 - np.exp(-sketch.depth))
+        self.assertEqual(sketch.total, len(stream))
+
+class SpaceSavingTest(unittest.TestCase):
+    def setUp(self):
+        self.stream = skewed_stream(60000, 8000, seed=1)
+        self.exact = pd.Series(self.stream).value_counts()
+
+    def test_top_k_recall_on_skewed_stream(self):
+        sketch = SpaceSaving(capacity=200)
+        for chunk in np.array_split(self.stream, 12):
+            sketch.add(chunk)
+
+        top = sketch.top(20)
+
+        self.assertEqual(set(top.index), set(self.exact.head(20).index))
+        overcount = top - self.exact.reindex(top.index)
+        self.assertTrue((overcount >= 0).all())
+        self.assertTrue((overcount <= sketch.max_error()).all())
+        # Every item above N / capacity must be reported
+        heavy = self.exact[self.exact > sketch.max_error()]
+        self.assertTrue(set(heavy.index) <= set(sketch.counts.index))
+
+    def test_merge_matches_single_pass(self):
+        single = SpaceSaving(capacity=200)
+        single.add(self.stream)
+        first, second = SpaceSaving(capacity=200), SpaceSaving(capacity=200)
+        first.add(self.stream[:25000])
+        second.add(self.stream[25000:])
+
+        merged = first.merge(second)
+
+        self.assertEqual(merged.total, single.total)
+        self.assertEqual(list(merged.top(20).index), list(single.top(20).index))
+        difference = (merged.top(20) - single.top(20).reindex(merged.top(20).index)).abs()
+        self.assertTrue((difference <= merged.max_error()).all())
+
+class HyperLogLogTest(unittest.TestCase):
+    def test_relative_error_at_default_precision(self):
+        # Four standard errors (about 3.3% at p=14), across the small, mid and large ranges
+        tolerance = 4 * HyperLogLog().relative_error()
+        for distinct in [100, 1000, 10000, 40000, 200000]:
+            sketch = HyperLogLog()
+            values = np.array([f'title {i}' for i in range(distinct)], dtype=object)
+            # Duplicates must not change the estimate
+            sketch.add(values)
+            sketch.add(values[:distinct // 2])
+            self.assertLess(abs(sketch.count() / distinct - 1), tolerance, distinct)
+
+    def test_merge_equals_union(self):
+        values = np.array([f'title {i}' for i in range(30000)], dtype=object)
+        first, second, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+        first.add(values[:20000])
+        second.add(values[10000:])
+        union.add(values)
+
+        self.assertEqual(first.merge(second).count(), union.count())
+
+    def test_empty_sketch_counts_zero(self):
+        self.assertEqual(HyperLogLog().count(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
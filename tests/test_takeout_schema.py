@@ -0,0 +1,58 @@
+import os
+import sys
+import json
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from takeout_schema import salvage_records
+
+def takeout_record(index):
+    """A Takeout entry with a nested subtitles list."""
+    return {
+        'header': 'YouTube',
+        'title': f'Watched Video {index}',
+        'titleUrl': f'https://www.youtube.com/watch?v=video{index:06d}',
+        'subtitles': [{'name': f'Creator {index}', 'url': f'https://www.youtube.com/channel/UC{index:06d}'}],
+        'time': f'2024-01-{index + 1:02d}T12:00:00.000Z'
+    }
+
+class SalvageRecordsTest(unittest.TestCase):
+    def test_truncated_last_record_keeps_nested_objects_out(self):
+        records = [takeout_record(i) for i in range(3)]
+        text = json.dumps(records, indent=2)
+        # Cut the last record inside its subtitles list
+        truncated = text[:text.rindex('"url"')]
+
+        salvaged, fragments = salvage_records(truncated)
+
+        self.assertEqual(salvaged, records[:2])
+        self.assertEqual(len(fragments), 1)
+        self.assertTrue(fragments[0].lstrip().startswith('{'))
+        self.assertIn('Watched Video 2', fragments[0])
+
+    def test_broken_record_with_nested_objects_resyncs_at_next_record(self):
+        records = [takeout_record(i) for i in range(4)]
+        text = json.dumps(records)
+        # Corrupt a value in the second record after its nested subtitles
+        broken = text.replace('"2024-01-02T12:00:00.000Z"', '2024-01-02')
+
+        salvaged, fragments = salvage_records(broken)
+
+        self.assertEqual(salvaged, [records[0]] + records[2:])
+        self.assertEqual(len(fragments), 1)
+        self.assertIn('Watched Video 1', fragments[0])
+
+    def test_braces_inside_strings_do_not_resync(self):
+        records = [takeout_record(i) for i in range(3)]
+        records[1]['title'] = 'Watched [{"title": "not a record"}], {'
+        text = json.dumps(records)
+        broken = text.replace('"2024-01-02T12:00:00.000Z"', 'oops')
+
+        salvaged, fragments = salvage_records(broken)
+
+        self.assertEqual(salvaged, [records[0], records[2]])
+        self.assertEqual(len(fragments), 1)
+
+if __name__ == '__main__':
+    unittest.main()